@@ -0,0 +1,162 @@
+#Benchmark for the network importer on synthetic networks.
+#
+#Run inside Blender in background mode:
+#    blender -b --factory-startup -P benchmarks/benchmark.py -- --nodes 1000 --density 0.01 --timesteps 20
+#or with the bpy Python module:
+#    python benchmarks/benchmark.py --nodes 1000 --density 0.01 --timesteps 20
+#
+#Each run appends one JSON line with its settings, wall time, peak RSS, datablock
+#counts and the import profile to the results file, so runs from different versions
+#can be compared. Peak RSS is for the whole process, so use one run per process.
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import bpy
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import import_network
+
+vertex_header=["name","x","y","z","colour","shape","size","shorten","red","green","blue"]
+vertex_attrs=["name","x","y","z","colour","shape","size","shorten"]
+edge_attrs=["colour","size","curve","forcecurve","is3d","arrowsize","arrowlength","dash","isdashed"]
+edge_header=(["from","to"]+edge_attrs+["from_"+a for a in vertex_attrs]+["to_"+a for a in vertex_attrs]
+    +["red","green","blue","name"])
+
+def rbool(value):
+    return "TRUE" if value else "FALSE"
+
+def make_network(nodes,density,seed):
+    #node names and random edges, about density of all possible pairs
+    rng=random.Random(seed)
+    names=["v%06d"%i for i in range(nodes)]
+    pairs=nodes*(nodes-1)//2
+    nedges=min(pairs,int(round(density*pairs)))
+    edges=set()
+    while len(edges)<nedges:
+        a,b=rng.sample(range(nodes),2)
+        edges.add((min(a,b),max(a,b)))
+    return names,sorted(edges)
+
+def write_timestep(folder,t,names,edges,args,rng):
+    #one vdata/edata pair in the layout written by net2blendR
+    suffix="%04d"%t
+    radius=math.sqrt(len(names))
+    vertices=[]
+    for k,name in enumerate(names):
+        #nodes drift a little between timesteps
+        angle=2*math.pi*k/len(names)+0.01*t
+        x=radius*math.cos(angle)+rng.uniform(-0.1,0.1)
+        y=radius*math.sin(angle)+rng.uniform(-0.1,0.1)
+        z=rng.uniform(-1,1) if args.is3d else 0
+        red,green,blue=rng.random(),rng.random(),rng.random()
+        vertices.append([name,x,y,z,"#%02x%02x%02x"%(int(red*255),int(green*255),int(blue*255)),
+            args.shape,0.2,0.15,red,green,blue])
+    with open(os.path.join(folder,"bench_vdata_"+suffix+"_.csv"),"w",newline="") as f:
+        w=csv.writer(f)
+        w.writerow(vertex_header)
+        w.writerows(vertices)
+    with open(os.path.join(folder,"bench_edata_"+suffix+"_.csv"),"w",newline="") as f:
+        w=csv.writer(f)
+        w.writerow(edge_header)
+        erng=random.Random(args.seed)
+        for a,b in edges:
+            va,vb=vertices[a],vertices[b]
+            length=math.dist(va[1:4],vb[1:4])
+            curved=erng.random()<args.curved
+            dashed=erng.random()<args.dashed
+            arrowed=erng.random()<args.arrowed
+            red,green,blue=va[8:11]
+            row=[a+1,b+1,va[4],0.02,0.2 if curved else 0,rbool(False),rbool(args.is3d),
+                0.05 if arrowed else 0,0.2 if arrowed else 0,0.1*length if dashed else 0,rbool(False)]
+            row+=va[:8]+vb[:8]+[red,green,blue,va[0]+"_"+vb[0]]
+            w.writerow(row)
+
+def datablocks():
+    keyframes=sum(len(fc.keyframe_points) for action in bpy.data.actions for fc in action.fcurves)
+    return {"objects":len(bpy.data.objects),"meshes":len(bpy.data.meshes),"curves":len(bpy.data.curves),
+            "materials":len(bpy.data.materials),"actions":len(bpy.data.actions),"keyframes":keyframes}
+
+def parse_args():
+    argv=sys.argv[sys.argv.index("--")+1:] if "--" in sys.argv else sys.argv[1:]
+    parser=argparse.ArgumentParser(description="Benchmark the network importer on a synthetic network")
+    parser.add_argument("--mode",choices=["single","folder"],default="folder")
+    parser.add_argument("--nodes",type=int,default=200)
+    parser.add_argument("--density",type=float,default=0.02,help="fraction of all node pairs joined by an edge")
+    parser.add_argument("--timesteps",type=int,default=10)
+    parser.add_argument("--curved",type=float,default=0.25,help="fraction of curved edges")
+    parser.add_argument("--dashed",type=float,default=0.1,help="fraction of dashed edges")
+    parser.add_argument("--arrowed",type=float,default=0.25,help="fraction of edges with arrowheads")
+    parser.add_argument("--shape",default="sphere")
+    parser.add_argument("--is3d",action="store_true")
+    parser.add_argument("--seed",type=int,default=1)
+    parser.add_argument("--instance",action="store_true",help="import option: instance nodes")
+    parser.add_argument("--merge",action="store_true",help="import option: merge edges")
+    parser.add_argument("--shared",action="store_true",help="import option: shared materials")
+    parser.add_argument("--keymode",choices=["BULK","INSERT"],default="BULK")
+    parser.add_argument("--changed",action="store_true",help="import option: only key changes")
+    parser.add_argument("--workers",type=int,default=0)
+    parser.add_argument("--data",help="folder for the generated csvs, a temporary folder by default")
+    parser.add_argument("--results",default="benchmark_results.jsonl")
+    parser.add_argument("--label",default="",help="free text stored with the results, e.g. a version")
+    return parser.parse_args(argv)
+
+def main():
+    args=parse_args()
+    folder=args.data or tempfile.mkdtemp(prefix="net2blend_bench_")
+    os.makedirs(folder,exist_ok=True)
+    names,edges=make_network(args.nodes,args.density,args.seed)
+    rng=random.Random(args.seed)
+    timesteps=1 if args.mode=="single" else args.timesteps
+    for t in range(timesteps):
+        write_timestep(folder,t,names,edges,args,rng)
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    if not hasattr(bpy.types.Scene,"netimport"):
+        import_network.register()
+    netimp=bpy.context.scene.netimport
+    netimp.instancebool=args.instance
+    netimp.mergebool=args.merge
+    netimp.sharedmatbool=args.shared
+    netimp.keymode=args.keymode
+    netimp.changedbool=args.changed
+    netimp.workers=args.workers
+    profilepath=os.path.join(folder,"profile.json")
+    netimp.profilepath=profilepath
+
+    start=time.perf_counter()
+    if args.mode=="single":
+        netimp.vdatapath=os.path.join(folder,"bench_vdata_0000_.csv")
+        netimp.edatapath=os.path.join(folder,"bench_edata_0000_.csv")
+        netimp.cframe=0
+        result=bpy.ops.object.network()
+    else:
+        netimp.folderpath=folder
+        netimp.orderbool=True
+        netimp.framebool=False
+        netimp.frameint=10
+        result=bpy.ops.object.networkfolder()
+    wall=time.perf_counter()-start
+
+    with open(profilepath) as f:
+        profile=json.load(f)
+    record={"label":args.label,"blender":bpy.app.version_string,"result":sorted(result),
+            "settings":{k:v for k,v in vars(args).items() if k not in ("data","results","label")},
+            "edges":len(edges),"wall":wall,
+            #ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb":resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+            "datablocks":datablocks(),"profile":profile}
+    with open(args.results,"a") as f:
+        f.write(json.dumps(record)+"\n")
+    print("%s %d nodes %d edges %d timesteps: %.2fs, %.0f MB peak"%(args.mode,args.nodes,len(edges),timesteps,wall,record["peak_rss_mb"]))
+
+if __name__=="__main__":
+    main()
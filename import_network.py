@@ -13,19 +13,53 @@ bl_info = {
 
 
 import bpy
+import bmesh
+import gpu
+from gpu_extras.batch import batch_for_shader
 from mathutils import Vector
 import csv
+import gzip
 import os
+import re
+import bisect
+import sys
+import argparse
+import subprocess
+import time
+import json
+import logging
+from contextlib import contextmanager
+import hashlib
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+#bundled with Blender, but the importer still works without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from bpy.props import (StringProperty,
                        PointerProperty,
                        IntProperty,
-                       BoolProperty
+                       BoolProperty,
+                       FloatProperty,
+                       EnumProperty
                        )
 from bpy.types import (Panel,
                        Operator,
                        PropertyGroup,
                        )
+from bpy.app.handlers import persistent
+
+#quiet unless the log level is raised in the import options
+log=logging.getLogger("net2blend")
+if not log.handlers:
+    log.addHandler(logging.StreamHandler())
+log.setLevel(logging.WARNING)
 
 
 # ------------------------------------------------------------------------
@@ -38,7 +72,7 @@ class NetProps(PropertyGroup):
 
     edatapath: StringProperty(
         name="",
-        description=":Edge CSV path",
+        description=":Edge CSV path, or folder of .npy columns",
         default="",
         maxlen=1024,
         subtype="FILE_PATH"
@@ -46,7 +80,7 @@ class NetProps(PropertyGroup):
         
     vdatapath: StringProperty(
         name="",
-        description=":Vertex CSV path",
+        description=":Vertex CSV path, or folder of .npy columns",
         default="",
         maxlen=1024,
         subtype="FILE_PATH",
@@ -63,6 +97,18 @@ class NetProps(PropertyGroup):
         description=":Gap between network timesteps",
         default=24,
         )
+
+    timecolumn: StringProperty(
+        name="",
+        description=":Column of the single network tables giving each row's timestep, leave empty for one timestep",
+        default="",
+        )
+
+    timeframebool: BoolProperty(
+        name="",
+        description=":The timestep column holds frame numbers rather than times keyed Frames apart",
+        default=False
+        )
         
     folderpath: StringProperty(
         name="",
@@ -82,20 +128,1484 @@ class NetProps(PropertyGroup):
         name="",
         description=":Frame from suffix",
         default=False
-        )		
+        )
+
+    instancebool: BoolProperty(
+        name="",
+        description=":Instance all nodes on a single point cloud",
+        default=False
+        )
+
+    mergebool: BoolProperty(
+        name="",
+        description=":Write all edges as splines of one curve",
+        default=False
+        )
+
+    sharedmatbool: BoolProperty(
+        name="",
+        description=":Colour objects through shared materials instead of one material each",
+        default=False
+        )
+
+    linkbool: BoolProperty(
+        name="",
+        description=":Nodes with a custom object shape share its data instead of each copying it",
+        default=False
+        )
+
+    keymode: EnumProperty(
+        name="",
+        description=":How keyframes are written",
+        items=[('BULK',"Bulk","Write each F-Curve in one go at the end of the import"),
+               ('INSERT',"Insert","Insert every keyframe individually"),
+               ('LIVE',"Live","No keyframes, each timestep's values are saved in a sidecar folder and set on frame change")],
+        default='BULK'
+        )
+
+    livepath: StringProperty(
+        name="",
+        description=":Folder for the live animation sidecars, leave empty to use net2blend_live next to the .blend file",
+        default="",
+        maxlen=1024,
+        subtype="DIR_PATH"
+        )
+
+    loglevel: EnumProperty(
+        name="",
+        description=":How much the import writes to the console",
+        items=[('WARNING',"Quiet","Only warnings"),
+               ('INFO',"Summary","Progress and a profile of each import"),
+               ('DEBUG',"Everything","Every node and edge as it is added")],
+        default='WARNING'
+        )
+
+    profilepath: StringProperty(
+        name="",
+        description=":JSON file to write the import profile to, leave empty to skip",
+        default="",
+        maxlen=1024,
+        subtype="FILE_PATH"
+        )
+
+    changedbool: BoolProperty(
+        name="",
+        description=":Only keyframe values that change between timesteps",
+        default=False
+        )
+
+    keytolerance: FloatProperty(
+        name="Tolerance",
+        description=":Smallest change that is keyframed",
+        default=0.0001,
+        min=0,
+        precision=5,
+        )
+
+    workers: IntProperty(
+        name="",
+        description=":Processes used to read a folder of networks, 0 for one per core",
+        default=0,
+        min=0,
+        )
+
+    batchsize: IntProperty(
+        name="Rows",
+        description=":Rows imported between screen updates by the batch import",
+        default=2000,
+        min=1,
+        )
+
+    progress: StringProperty(
+        name="",
+        description=":Progress of the running batch import",
+        default="",
+        )
+
+    lod: EnumProperty(
+        name="",
+        description=":Detail of sphere and circle node meshes",
+        items=[('HIGH',"High","32 segments, as before"),
+               ('MEDIUM',"Medium","16 segments"),
+               ('LOW',"Low","8 segments"),
+               ('ICO',"Icosphere","80 face icospheres"),
+               ('BILLBOARD',"Billboard","Single quads facing the camera"),
+               ('SIZE',"By size","High, medium or low from each node's size"),
+               ('DISTANCE',"By distance","High, medium or low from each node's size and distance to the camera")],
+        default='HIGH'
+        )
+
+    lodsize: FloatProperty(
+        name="Size",
+        description=":Smallest node size drawn in high detail by the automatic levels",
+        default=0.5,
+        min=0.000001,
+        )
+
+    loddistance: FloatProperty(
+        name="Distance",
+        description=":Camera distance at which a node of that size is still drawn in high detail",
+        default=20,
+        min=0.000001,
+        )
+
+    lodrender: BoolProperty(
+        name="",
+        description=":Render nodes in high detail whatever their viewport detail",
+        default=False
+        )
+
+    streambool: BoolProperty(
+        name="",
+        description=":Read and build csvs a chunk of rows at a time, for very large or .csv.gz files",
+        default=False
+        )
+
+    chunkrows: IntProperty(
+        name="Rows",
+        description=":Rows read at a time when streaming",
+        default=50000,
+        min=1,
+        )
+
+    largebool: BoolProperty(
+        name="",
+        description=":Import without an undo step and remove unused data left by earlier imports of the network",
+        default=False
+        )
+
+    cachepath: StringProperty(
+        name="",
+        description=":Folder to keep parsed csvs in, leave empty to always read the csvs",
+        default="",
+        maxlen=1024,
+        subtype="DIR_PATH"
+        )
+
+    cachesize: IntProperty(
+        name="MB",
+        description=":Largest size of the parsed csv cache",
+        default=1024,
+        min=1,
+        )
+
+    missingmode: EnumProperty(
+        name="",
+        description=":What happens to nodes and edges missing from a timestep",
+        items=[('HIDE',"Hide","Key them hidden in the viewport and render on the frames they disappear and reappear"),
+               ('SCALE',"Scale to zero","Key their size to zero on the frames they disappear and reappear"),
+               ('KEEP',"Keep","Hold their last keys, for networks padded with placeholder rows")],
+        default='HIDE'
+        )
 # ------------------------------------------------------------------------
 #    Functions
 # ------------------------------------------------------------------------
 
-
+class NetImportError(Exception):
+    pass
+
+#columns read from the vertex and edge csvs, with the type they are parsed to
+vertex_columns=[("name",str),("x",float),("y",float),("z",float),("colour",str),
+    ("shape",str),("size",float),("red",float),("green",float),("blue",float)]
+edge_columns=[("from_name",str),("to_name",str),("size",float),("colour",str),
+    ("from_x",float),("from_y",float),("from_z",float),("to_x",float),("to_y",float),("to_z",float),
+    ("red",float),("green",float),("blue",float),("curve",float),("forcecurve",bool),
+    ("from_shorten",float),("to_shorten",float),("arrowlength",float),("arrowsize",float),
+    ("is3d",bool),("dash",float),("isdashed",bool),("name",str)]
+
+def typed_column(values,coltype):
+    if coltype is float:
+        if np is not None:
+            return np.array(values,dtype=float)
+        return [float(v) for v in values]
+    if coltype is bool:
+        if np is not None:
+            return np.array([v=="TRUE" for v in values],dtype=bool)
+        return [v=="TRUE" for v in values]
+    return list(values)
+
+def open_csv(path):
+    #plain or gzip compressed csv
+    if path.endswith(".gz"):
+        return gzip.open(path,"rt",newline='')
+    return open(path,newline='')
+
+def header_columns(path,header,columns):
+    missing=[c for c,t in columns if c not in header]
+    if missing:
+        raise NetImportError(os.path.basename(path)+" is missing columns: "+", ".join(missing))
+    return [header.index(c) for c,t in columns]
+
+def check_columns(path,columns):
+    #fail before anything is read if a csv lacks columns
+    with open_csv(path) as csvfile:
+        header_columns(path,next(csv.reader(csvfile),[]),columns)
+
+def rows_table(rows,columns):
+    if rows:
+        cols=list(zip(*rows))
+    else:
+        cols=[()]*len(columns)
+    return {c:typed_column(cols[k],t) for k,(c,t) in enumerate(columns)}
+
+def table_chunks(path,columns,chunkrows=None):
+    #parse a csv into dicts of typed columns, chunkrows rows at a time (all at once for None),
+    #always at least one even if it is empty
+    with open_csv(path) as csvfile:
+        rdr=csv.reader(csvfile)
+        colind=header_columns(path,next(rdr,[]),columns)
+        rows=[]
+        sent=False
+        for row in rdr:
+            if row:
+                rows.append([row[i] for i in colind])
+                if chunkrows is not None and len(rows)>=chunkrows:
+                    yield rows_table(rows,columns)
+                    sent=True
+                    rows=[]
+        if rows or not sent:
+            yield rows_table(rows,columns)
+
+def read_table(path,columns):
+    #parse a csv in one pass into a dict of typed columns
+    return next(table_chunks(path,columns))
+
+def stream_timestep(vdatapath,edatapath,chunkrows):
+    #(vertex table, edge table, edge geometry) chunks of one timestep, vertices first,
+    #so only chunkrows rows are held at a time
+    check_columns(vdatapath,vertex_columns)
+    check_columns(edatapath,edge_columns)
+    noedges=rows_table([],edge_columns)
+    novertices=rows_table([],vertex_columns)
+    for vtable in table_chunks(vdatapath,vertex_columns,chunkrows):
+        yield vtable,noedges,edge_geometry(noedges)
+    for etable in table_chunks(edatapath,edge_columns,chunkrows):
+        yield novertices,etable,edge_geometry(etable)
+
+def table_rows(table,names):
+    #iterate a table row by row as plain python values
+    cols=[table[c] for c in names]
+    cols=[c.tolist() if hasattr(c,"tolist") else c for c in cols]
+    return zip(*cols)
+
+def cache_entry(cachepath,path):
+    #cache directory of one csv, named from its absolute path
+    key=hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(cachepath,key)
+
+def read_column_dir(path,columns):
+    #a directory holding one .npy file per column, memory-mapped instead of parsed
+    if np is None:
+        raise NetImportError(os.path.basename(path)+" is a folder of .npy columns, which needs numpy")
+    missing=[c for c,t in columns if not os.path.isfile(os.path.join(path,c+".npy"))]
+    if missing:
+        raise NetImportError(os.path.basename(path)+" is missing columns: "+", ".join(missing))
+    table={}
+    for c,t in columns:
+        try:
+            col=np.load(os.path.join(path,c+".npy"),mmap_mode="r",allow_pickle=False)
+        except ValueError:
+            #object arrays would need unpickling
+            raise NetImportError(os.path.basename(path)+" column "+c+" is not a plain numpy array")
+        if col.dtype.kind=="S":
+            col=np.char.decode(col,"utf-8")
+        if t is str:
+            table[c]=[str(v) for v in col.tolist()]
+        elif t is bool:
+            #logical columns may also be written as the TRUE/FALSE strings of the csvs
+            table[c]=col=="TRUE" if col.dtype.kind in "US" else col.astype(bool,copy=False)
+        else:
+            table[c]=col.astype(float,copy=False)
+    return table
+
+def load_table(path,columns,cachepath=""):
+    #read_table through an on-disk cache of .npy columns, reused while the csv keeps its size and mtime
+    if os.path.isdir(path):
+        return read_column_dir(path,columns)
+    if not cachepath or np is None:
+        return read_table(path,columns)
+    stat=os.stat(path)
+    stamp="%d %d"%(stat.st_size,stat.st_mtime_ns)
+    names=[c for c,t in columns]
+    entry=cache_entry(cachepath,path)
+    try:
+        with open(os.path.join(entry,"stamp.txt")) as f:
+            cached=f.read().split("\n")
+    except OSError:
+        cached=None
+    if cached is not None:
+        if cached[0]==stamp and set(names)<=set(cached[1:]):
+            table={}
+            for c,t in columns:
+                col=np.load(os.path.join(entry,c+".npy"),mmap_mode="r")
+                table[c]=col.tolist() if t is str else col
+            #entries are evicted least recently used first
+            os.utime(entry)
+            return table
+        #the csv changed since it was cached
+        shutil.rmtree(entry,ignore_errors=True)
+    table=read_table(path,columns)
+    os.makedirs(cachepath,exist_ok=True)
+    tmp=tempfile.mkdtemp(dir=cachepath)
+    for c,t in columns:
+        np.save(os.path.join(tmp,c+".npy"),np.asarray(table[c],dtype=str) if t is str else table[c])
+    with open(os.path.join(tmp,"stamp.txt"),"w") as f:
+        f.write("\n".join([stamp]+names))
+    try:
+        os.rename(tmp,entry)
+    except OSError:
+        #written by another worker in the meantime
+        shutil.rmtree(tmp,ignore_errors=True)
+    return table
+
+def prune_cache(cachepath,cachesize):
+    #drop least recently used entries until the cache is under cachesize megabytes
+    if not cachepath or not os.path.isdir(cachepath):
+        return
+    entries=[]
+    total=0
+    for name in os.listdir(cachepath):
+        entry=os.path.join(cachepath,name)
+        if not os.path.isdir(entry):
+            continue
+        size=sum(f.stat().st_size for f in os.scandir(entry) if f.is_file())
+        entries.append((os.path.getmtime(entry),size,entry))
+        total+=size
+    entries.sort()
+    for used,size,entry in entries:
+        if total<=cachesize*1024*1024:
+            break
+        shutil.rmtree(entry,ignore_errors=True)
+        total-=size
+
+def track_quats(vecs):
+    #numpy version of Vector.to_track_quat('Z','X') for rows of vectors
+    q=np.zeros((len(vecs),4))
+    q[:,0]=1
+    length=np.linalg.norm(vecs,axis=1)
+    ok=length>0
+    tvec=np.zeros_like(vecs)
+    tvec[ok]=vecs[ok]/length[ok,None]
+    #rotate z onto the vector
+    nor=np.stack([-tvec[:,1],tvec[:,0],np.zeros(len(vecs))],axis=1)
+    norlen=np.linalg.norm(nor,axis=1)
+    nor[norlen==0]=[1,0,0]
+    norlen[norlen==0]=1
+    nor/=norlen[:,None]
+    angle=0.5*np.arccos(np.clip(tvec[:,2],-1,1))
+    q1=np.concatenate([np.cos(angle)[:,None],nor*np.sin(angle)[:,None]],axis=1)
+    #then twist about it so x stays up
+    w,x,y,z=q1.T
+    fp0=2*(w*y+x*z)
+    fp1=2*(y*z-w*x)
+    angle=0.5*np.arctan2(-fp1,-fp0)
+    q2=np.concatenate([np.cos(angle)[:,None],tvec*np.sin(angle)[:,None]],axis=1)
+    aw,ax,ay,az=q2.T
+    q[ok]=np.stack([aw*w-ax*x-ay*y-az*z,
+        aw*x+ax*w+ay*z-az*y,
+        aw*y-ax*z+ay*w+az*x,
+        aw*z+ax*y-ay*x+az*w],axis=1)[ok]
+    return q
+
+def edge_geometry(table):
+    #shortened end points, curve control point and arrowhead rotation of every edge,
+    #shared by the curves and their arrowheads
+    if np is None:
+        return edge_geometry_rows(table)
+    v0=np.stack([table["from_x"],table["from_y"],table["from_z"]],axis=1).reshape(-1,3)
+    v1=np.stack([table["to_x"],table["to_y"],table["to_z"]],axis=1).reshape(-1,3)
+    ecurve=table["curve"]
+    curved=(ecurve>0)|table["forcecurve"]
+    toshorten=table["to_shorten"]+table["arrowlength"]
+    vec=v1-v0
+    length=np.linalg.norm(vec,axis=1)
+    unit=vec/np.where(length>0,length,1)[:,None]
+    start=v0+unit*table["from_shorten"][:,None]
+    end=start+unit*(np.linalg.norm(v1-start,axis=1)-toshorten)[:,None]
+    mid=(start+end)/2
+    #bend away from the axis the edge runs least along
+    span=np.abs(end-start)
+    res=2-np.argmin(span[:,::-1],axis=1)
+    dir2=np.cross(end-start,np.eye(3)[res])
+    dirlen=np.linalg.norm(dir2,axis=1)
+    dir2/=np.where(dirlen>0,dirlen,1)[:,None]
+    control=np.where((ecurve>0)[:,None],mid+dir2*ecurve[:,None],mid)
+    #arrowheads point along the last stretch of the curve
+    tail=np.where(curved[:,None],control,end)
+    return {"start":start,"end":end,"control":control,"mid":mid,"curved":curved,"arrow":track_quats(v1-tail)}
+
+def edge_geometry_rows(table):
+    #edge_geometry without numpy
+    geom={"start":[],"end":[],"control":[],"mid":[],"curved":[],"arrow":[]}
+    for row in table_rows(table,["from_x","from_y","from_z","to_x","to_y","to_z","curve","forcecurve","from_shorten","to_shorten","arrowlength"]):
+        from_x,from_y,from_z,to_x,to_y,to_z,ecurve,forcecurve,fromshorten,toshorten,arrowlength=row
+        curved=(ecurve>0)|forcecurve
+        v0, v1 = Vector((from_x,from_y,from_z)), Vector((to_x,to_y,to_z))
+        tip=v1
+        toshorten=toshorten+arrowlength
+        vec1=(v1-v0)
+        vec1.normalize()
+        v0=v0+(vec1*fromshorten)
+        v1=v0+(vec1*((v1-v0).length-toshorten))
+        o = (v1 + v0) / 2
+        v2=o
+        if ecurve>0:
+            vsize=[abs(i) for i in list(v1-v0)]
+            res = len(vsize) - 1 - vsize[::-1].index(min(vsize))
+            curvev=[0,0,0]
+            curvev[res]=1
+            dir2 = (v1-v0).cross(Vector(curvev))
+            dir2.normalize()
+            v2=o+(dir2*ecurve)
+        avec=tip-(v2 if curved else v1)
+        geom["start"].append(tuple(v0))
+        geom["end"].append(tuple(v1))
+        geom["control"].append(tuple(v2))
+        geom["mid"].append(tuple(o))
+        geom["curved"].append(curved)
+        geom["arrow"].append(tuple(avec.to_track_quat('Z', 'X')))
+    return geom
+
+node_shapes=["sphere","cube","circle","square"]
+
+#segments of round shapes at each level of detail, high matches the bpy.ops primitives
+lod_segments={"HIGH":32,"MEDIUM":16,"LOW":8,"ICO":8,"BILLBOARD":8}
+
+def shape_mesh(shape,lod="HIGH"):
+    #shared mesh for one of the primitive node shapes, built once per file and level of detail
+    name="net2blend_"+shape
+    if lod!="HIGH" and shape in ("sphere","circle"):
+        name+="_"+lod.lower()
+    if name in bpy.data.meshes:
+        return bpy.data.meshes[name]
+    bm=bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    #same dimensions as the bpy.ops primitives
+    if shape=="sphere":
+        if lod=="ICO":
+            bmesh.ops.create_icosphere(bm,subdivisions=2,radius=1,calc_uvs=True)
+        elif lod=="BILLBOARD":
+            #a single quad, turned to the camera by the node's constraint
+            bmesh.ops.create_grid(bm,x_segments=1,y_segments=1,size=1,calc_uvs=True)
+        else:
+            bmesh.ops.create_uvsphere(bm,u_segments=lod_segments[lod],v_segments=lod_segments[lod]//2,radius=1,calc_uvs=True)
+    elif shape=="cube":
+        bmesh.ops.create_cube(bm,size=2,calc_uvs=True)
+    elif shape=="circle":
+        bmesh.ops.create_circle(bm,cap_ends=True,cap_tris=True,segments=lod_segments[lod],radius=1,calc_uvs=True)
+    elif shape=="square":
+        bmesh.ops.create_grid(bm,x_segments=1,y_segments=1,size=1,calc_uvs=True)
+    elif shape=="cone":
+        #arrowhead, with its origin already at the median of its vertices
+        bmesh.ops.create_cone(bm,cap_ends=True,cap_tris=True,segments=32,radius1=1,radius2=0,depth=2,calc_uvs=True)
+        median=sum((v.co for v in bm.verts),Vector())/len(bm.verts)
+        bmesh.ops.translate(bm,vec=-median,verts=bm.verts)
+    mesh=bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    #empty slot so each object can link its own material
+    mesh.materials.append(None)
+    return mesh
+
+def node_lod(netimp,scene,size,location):
+    #level of detail of one node mesh, the automatic modes compare its size (and distance
+    #to the camera) with a node of lodsize seen from loddistance
+    mode=netimp.lod
+    if mode not in ("SIZE","DISTANCE"):
+        return mode
+    ratio=size/netimp.lodsize
+    if mode=="DISTANCE" and scene.camera is not None:
+        distance=(scene.camera.matrix_world.translation-Vector(location)).length
+        ratio*=netimp.loddistance/max(distance,0.000001)
+    if ratio>=1:
+        return "HIGH"
+    if ratio>=0.25:
+        return "MEDIUM"
+    return "LOW"
+
+def set_node_mesh(ob,shape,lod,camera=None):
+    #swap a node to a level of detail, billboards track the camera
+    ob.data=shape_mesh(shape,lod)
+    ob["net2blend_lod"]=lod
+    track=ob.constraints.get("net2blend_billboard")
+    if lod=="BILLBOARD" and shape=="sphere" and camera is not None:
+        if track is None:
+            track=ob.constraints.new('DAMPED_TRACK')
+            track.name="net2blend_billboard"
+            track.track_axis='TRACK_Z'
+        track.target=camera
+    elif track is not None:
+        ob.constraints.remove(track)
+
+@persistent
+def lod_render_pre(scene,depsgraph=None):
+    #renders use the full detail meshes
+    if not scene.netimport.lodrender:
+        return
+    for ob in scene.objects:
+        if ob.get("net2blend_lod","HIGH")!="HIGH" and "net2blend_shape" in ob:
+            ob.data=shape_mesh(ob["net2blend_shape"])
+
+@persistent
+def lod_render_post(scene,depsgraph=None):
+    #back to the viewport meshes
+    for ob in scene.objects:
+        if ob.get("net2blend_lod","HIGH")!="HIGH" and "net2blend_shape" in ob:
+            ob.data=shape_mesh(ob["net2blend_shape"],ob["net2blend_lod"])
+
+def group_socket(tree,in_out,socket_type,name):
+    #node group interfaces moved to tree.interface in Blender 4.0
+    if hasattr(tree,"interface"):
+        return tree.interface.new_socket(name,in_out=in_out,socket_type=socket_type)
+    if in_out=='INPUT':
+        return tree.inputs.new(socket_type,name)
+    return tree.outputs.new(socket_type,name)
+
+def instancer_group(name,shapes):
+    #geometry nodes group placing one child of shapes on every point
+    if name in bpy.data.node_groups:
+        return bpy.data.node_groups[name]
+    ng=bpy.data.node_groups.new(name,'GeometryNodeTree')
+    group_socket(ng,'INPUT','NodeSocketGeometry','Geometry')
+    group_socket(ng,'INPUT','NodeSocketInt','Shape')
+    group_socket(ng,'INPUT','NodeSocketFloat','Size')
+    group_socket(ng,'OUTPUT','NodeSocketGeometry','Geometry')
+    gin=ng.nodes.new('NodeGroupInput')
+    gout=ng.nodes.new('NodeGroupOutput')
+    info=ng.nodes.new('GeometryNodeCollectionInfo')
+    info.transform_space='ORIGINAL'
+    info.inputs['Collection'].default_value=shapes
+    info.inputs['Separate Children'].default_value=True
+    info.inputs['Reset Children'].default_value=True
+    inst=ng.nodes.new('GeometryNodeInstanceOnPoints')
+    inst.inputs['Pick Instance'].default_value=True
+    ng.links.new(inst.inputs['Points'],gin.outputs['Geometry'])
+    ng.links.new(inst.inputs['Instance'],info.outputs['Geometry'])
+    ng.links.new(inst.inputs['Instance Index'],gin.outputs['Shape'])
+    ng.links.new(inst.inputs['Scale'],gin.outputs['Size'])
+    ng.links.new(gout.inputs['Geometry'],inst.outputs['Instances'])
+    gin.location=(-400,0)
+    info.location=(-200,-200)
+    gout.location=(200,0)
+    return ng
+
+def instancer_material():
+    #material colouring each instance from the colour attribute of its point
+    name="net2blend_instanced_mat"
+    if name in bpy.data.materials:
+        return bpy.data.materials[name]
+    mat=bpy.data.materials.new(name=name)
+    mat.use_nodes=True
+    attr=mat.node_tree.nodes.new(type="ShaderNodeAttribute")
+    attr.attribute_type='INSTANCER'
+    attr.attribute_name="colour"
+    bsdf=mat.node_tree.nodes["Principled BSDF"]
+    mat.node_tree.links.new(bsdf.inputs[0],attr.outputs["Color"])
+    return mat
+
+def dash_group():
+    #dash shader shared by every dashed material: a checker texture along the
+    #curve uv mixing an opaque and a see-through bsdf
+    name="net2blend_dash"
+    if name in bpy.data.node_groups:
+        return bpy.data.node_groups[name]
+    ng=bpy.data.node_groups.new(name,'ShaderNodeTree')
+    colour=group_socket(ng,'INPUT','NodeSocketColor','Colour')
+    colour.default_value=(0.8,0.8,0.8,1)
+    group_socket(ng,'INPUT','NodeSocketFloat','Dash')
+    group_socket(ng,'INPUT','NodeSocketFloat','Dashed')
+    group_socket(ng,'OUTPUT','NodeSocketShader','Shader')
+    gin=ng.nodes.new('NodeGroupInput')
+    gout=ng.nodes.new('NodeGroupOutput')
+
+    checker=ng.nodes.new(type="ShaderNodeTexChecker")
+    checker.inputs["Scale"].default_value=1
+    mix=ng.nodes.new(type="ShaderNodeMixShader")
+    bsdf=ng.nodes.new(type="ShaderNodeBsdfPrincipled")
+    bsdf2=ng.nodes.new(type="ShaderNodeBsdfPrincipled")
+    ng.links.new(mix.inputs["Fac"],checker.outputs["Fac"])
+    ng.links.new(mix.inputs[1],bsdf.outputs["BSDF"])
+    ng.links.new(mix.inputs[2],bsdf2.outputs["BSDF"])
+    ng.links.new(bsdf.inputs["Base Color"],gin.outputs["Colour"])
+    ng.links.new(bsdf2.inputs["Base Color"],gin.outputs["Colour"])
+
+    #gaps are transparent while dashed is 1
+    gap=ng.nodes.new(type="ShaderNodeMath")
+    gap.operation='SUBTRACT'
+    gap.inputs[0].default_value=1
+    ng.links.new(gap.inputs[1],gin.outputs["Dashed"])
+    ng.links.new(bsdf2.inputs["Alpha"],gap.outputs["Value"])
+
+    #checker along the length of the curve, dash times per unit of uv
+    texcoord=ng.nodes.new(type="ShaderNodeTexCoord")
+    separate=ng.nodes.new(type="ShaderNodeSeparateXYZ")
+    ng.links.new(separate.inputs["Vector"],texcoord.outputs["UV"])
+    math=ng.nodes.new(type="ShaderNodeMath")
+    math.operation='MULTIPLY'
+    ng.links.new(math.inputs[0],separate.outputs["X"])
+    ng.links.new(math.inputs[1],gin.outputs["Dash"])
+    math2=ng.nodes.new(type="ShaderNodeMath")
+    math2.operation='MULTIPLY'
+    math2.inputs[1].default_value=0
+    ng.links.new(math2.inputs[0],separate.outputs["Y"])
+    combine=ng.nodes.new(type="ShaderNodeCombineXYZ")
+    ng.links.new(combine.inputs["X"],math.outputs["Value"])
+    ng.links.new(combine.inputs["Y"],math2.outputs["Value"])
+    ng.links.new(combine.inputs["Z"],separate.outputs["Z"])
+    ng.links.new(checker.inputs["Vector"],combine.outputs["Vector"])
+
+    ng.links.new(gout.inputs["Shader"],mix.outputs["Shader"])
+    return ng
+
+def build_dash_tree(mat):
+    #dashed material, a single instance of the dash group
+    mat.use_nodes=True
+    mat.blend_method='HASHED'
+    mat.shadow_method='HASHED'
+    tree=mat.node_tree
+    for node in [n for n in tree.nodes if n.type=='BSDF_PRINCIPLED']:
+        tree.nodes.remove(node)
+    output=[n for n in tree.nodes if n.type=='OUTPUT_MATERIAL'][0]
+    group=tree.nodes.new(type="ShaderNodeGroup")
+    group.node_tree=dash_group()
+    group.location=(output.location.x-200,output.location.y)
+    tree.links.new(output.inputs["Surface"],group.outputs["Shader"])
+    return group
+
+def shared_material(dashed):
+    #one material for every element, coloured from Object.color and
+    #dashed from the net2blend_dash/net2blend_dashed object properties
+    if dashed:
+        name="net2blend_dashed_mat"
+    else:
+        name="net2blend_solid_mat"
+    if name in bpy.data.materials:
+        return bpy.data.materials[name]
+    mat=bpy.data.materials.new(name=name)
+    if dashed:
+        target=build_dash_tree(mat).inputs["Colour"]
+    else:
+        mat.use_nodes=True
+        target=[n for n in mat.node_tree.nodes if n.type=='BSDF_PRINCIPLED'][0].inputs["Base Color"]
+    tree=mat.node_tree
+    info=tree.nodes.new(type="ShaderNodeObjectInfo")
+    tree.links.new(target,info.outputs["Color"])
+    if dashed:
+        group=target.node
+        for socket,prop in (("Dash","net2blend_dash"),("Dashed","net2blend_dashed")):
+            attr=tree.nodes.new(type="ShaderNodeAttribute")
+            attr.attribute_type='OBJECT'
+            attr.attribute_name=prop
+            tree.links.new(group.inputs[socket],attr.outputs["Fac"])
+    return mat
+
+def group_input_id(tree,name):
+    #identifier of a group input, used to key the matching modifier property
+    if hasattr(tree,"interface"):
+        return tree.interface.items_tree[name].identifier
+    return tree.inputs[name].identifier
+
+#object transforms are grouped the same way keyframe_insert groups them
+transform_paths=["location","rotation_euler","rotation_quaternion","scale"]
+
+def changed_points(points,tolerance):
+    #sorted (frame, value) keys without those inside a run of unchanged values,
+    #the last key before each change is kept so held values do not drift
+    frames=sorted(points)
+    kept=[]
+    for k,frame in enumerate(frames):
+        value=points[frame]
+        if kept and abs(value-kept[-1][1])<=tolerance:
+            if k==len(frames)-1 or abs(points[frames[k+1]]-kept[-1][1])<=tolerance:
+                continue
+        kept.append((frame,value))
+    return kept
+
+class KeyframeWriter():
+    #reference writer, one keyframe_insert per key
+    #with a tolerance, values within it of the last key are not keyed
+
+    def __init__(self,tolerance=None):
+        #keyframe points written and left out, one per F-Curve point
+        self.count=0
+        self.tolerance=tolerance
+        self.suppressed=0
+        self.last={}
+
+    def resolve(self,struct,prop):
+        #owner id, F-Curve path, values and whether they are keyed with constant interpolation
+        owner=struct.id_data
+        if prop.startswith("["):
+            #custom property
+            path=struct.path_from_id()+prop
+        else:
+            path=struct.path_from_id(prop)
+        value=struct.path_resolve(prop)
+        discrete=isinstance(value,(bool,int,str))
+        if isinstance(value,str):
+            #enums are animated by their integer value
+            value=struct.bl_rna.properties[prop].enum_items[value].value
+        if not hasattr(value,"__len__"):
+            value=[value]
+        return owner,path,[float(v) for v in value],discrete
+
+    def insert(self,struct,prop,frame):
+        if self.tolerance is not None:
+            owner,path,value,discrete=self.resolve(struct,prop)
+            key=(owner.as_pointer(),path)
+            last=self.last.get(key)
+            if last is not None and all(abs(a-b)<=self.tolerance for a,b in zip(value,last[0])):
+                #held, keyed later if the value changes
+                last[1]=frame
+                self.suppressed+=len(value)
+                return
+            if last is not None and last[1] is not None:
+                #close the held stretch at its last frame
+                for index,v in enumerate(last[0]):
+                    fc=owner.animation_data.action.fcurves.find(path,index=index)
+                    point=fc.keyframe_points.insert(last[1],v)
+                    if discrete:
+                        point.interpolation='CONSTANT'
+                self.suppressed-=len(last[0])
+                self.count+=len(last[0])
+            self.last[key]=[value,None]
+        else:
+            value=struct.path_resolve(prop)
+            if isinstance(value,str) or not hasattr(value,"__len__"):
+                value=[value]
+        struct.keyframe_insert(data_path=prop,frame=frame)
+        self.count+=len(value)
+
+    def flush(self):
+        self.last={}
+
+class BulkKeyframeWriter(KeyframeWriter):
+    #collects the keys of every F-Curve and writes each curve at once on flush
+
+    def __init__(self,tolerance=None):
+        KeyframeWriter.__init__(self,tolerance)
+        self.owners={}
+        self.curves={}
+
+    def insert(self,struct,prop,frame):
+        owner,path,value,discrete=self.resolve(struct,prop)
+        ptr=owner.as_pointer()
+        self.owners[ptr]=owner
+        for index,v in enumerate(value):
+            curve=self.curves.setdefault((ptr,path,index),[discrete,{}])
+            curve[1][frame]=v
+
+    def add_points(self,owner,path,index,points,discrete):
+        #{frame: value} keys of one F-Curve worked out elsewhere, e.g. read from another file
+        ptr=owner.as_pointer()
+        self.owners[ptr]=owner
+        curve=self.curves.setdefault((ptr,path,index),[discrete,{}])
+        curve[1].update(points)
+
+    def flush(self):
+        for (ptr,path,index),(discrete,points) in self.curves.items():
+            owner=self.owners[ptr]
+            anim=owner.animation_data
+            if anim is None:
+                anim=owner.animation_data_create()
+            if anim.action is None:
+                anim.action=bpy.data.actions.new(owner.name+"Action")
+            action=anim.action
+            group=""
+            if isinstance(owner,bpy.types.Object) and path in transform_paths:
+                group="Object Transforms"
+            fc=action.fcurves.find(path,index=index)
+            if fc is not None:
+                #merge with keys from earlier imports, new values win
+                old=[0.0]*(2*len(fc.keyframe_points))
+                fc.keyframe_points.foreach_get("co",old)
+                merged=dict(zip(old[0::2],old[1::2]))
+                merged.update(points)
+                points=merged
+                if fc.group:
+                    group=fc.group.name
+                action.fcurves.remove(fc)
+            fc=action.fcurves.new(path,index=index,action_group=group)
+            if self.tolerance is None:
+                keyed=[(frame,points[frame]) for frame in sorted(points)]
+            else:
+                keyed=changed_points(points,self.tolerance)
+                self.suppressed+=len(points)-len(keyed)
+            co=[]
+            for frame,value in keyed:
+                co.append(frame)
+                co.append(value)
+            fc.keyframe_points.add(len(keyed))
+            self.count+=len(keyed)
+            fc.keyframe_points.foreach_set("co",co)
+            if discrete:
+                for point in fc.keyframe_points:
+                    point.interpolation='CONSTANT'
+            fc.update()
+        self.owners={}
+        self.curves={}
+
+class LiveKeyframeWriter(BulkKeyframeWriter):
+    #collects keys like the bulk writer, but on flush saves them as one array per animated property
+    #in a sidecar folder that live_frame_change reads from, instead of writing F-Curves
+
+    def __init__(self,tolerance=None,folder=""):
+        BulkKeyframeWriter.__init__(self,tolerance)
+        self.folder=folder
+
+    def flush(self):
+        #no keyframes, the values saved in the sidecar are counted instead
+        self.count+=sum(len(points) for discrete,points in self.curves.values())
+        if self.curves:
+            write_live(self.folder,self.owners,self.curves,bpy.context.scene)
+            apply_live(bpy.context.scene,bpy.context.scene.frame_current)
+        self.owners={}
+        self.curves={}
+
+live_collections={'OBJECT':"objects",'MESH':"meshes",'CURVE':"curves",'MATERIAL':"materials",'NODETREE':"node_groups"}
+
+def live_owner(owner,trees):
+    #(bpy.data collection, name, path prefix) an animated id is found by again,
+    #material node trees are only reachable through their material
+    if getattr(owner,"is_embedded_data",False):
+        return "materials",trees[owner.as_pointer()],"node_tree."
+    return live_collections[owner.id_type],owner.name,""
+
+def held_values(values):
+    #fill the frames a property wasn't keyed at with its last key, and its first before that
+    frames=np.arange(len(values)).reshape((-1,)+(1,)*(values.ndim-1))
+    forward=np.take_along_axis(values,np.maximum.accumulate(np.where(np.isnan(values),0,frames),axis=0),axis=0)
+    backward=np.take_along_axis(values[::-1],np.maximum.accumulate(np.where(np.isnan(values[::-1]),0,frames),axis=0),axis=0)[::-1]
+    return np.where(np.isnan(forward),backward,forward)
+
+def write_live(folder,owners,curves,scene):
+    #one (frames, items, components) array per property path, items being the elements of one
+    #collection (e.g. every vertex of a mesh) or every id with the same path (e.g. all node locations)
+    trees={}
+    for mat in bpy.data.materials:
+        if mat.node_tree is not None:
+            trees[mat.node_tree.as_pointer()]=mat.name
+    tracks={}
+    for (ptr,path,index),(discrete,points) in curves.items():
+        collection,name,prefix=live_owner(owners[ptr],trees)
+        path=prefix+path
+        element=re.match(r"^(.*)\[(\d+)\]\.(\w+)$",path)
+        if element:
+            key=("items",collection,name,element.group(1),element.group(3))
+            item=int(element.group(2))
+        else:
+            key=("owners",collection,path)
+            item=name
+        tracks.setdefault((key,item),[discrete,{}])[1][index]=points
+    #sidecars of earlier imports of the same network are merged into this one, new values win,
+    #and removed so each network has one sidecar however often it is imported
+    collections=live_network(owners)
+    kept=[]
+    for path in scene.get("net2blend_live",[]):
+        old=bpy.path.abspath(path)
+        if not os.path.isfile(os.path.join(old,"live.json")):
+            continue
+        sidecar=live_sidecar(old)
+        if not set(sidecar["collections"])&set(collections):
+            kept.append(path)
+            continue
+        for group,values in zip(sidecar["groups"],sidecar["values"]):
+            if group["kind"]=="items":
+                key=("items",group["collection"],group["name"],group["path"],group["prop"])
+            else:
+                key=("owners",group["collection"],group["path"])
+            values=np.asarray(values)
+            for i,item in enumerate(group["items"]):
+                components=tracks.setdefault((key,item),[group["discrete"],{}])[1]
+                for index in range(group["components"]):
+                    points={f:float(v) for f,v in zip(sidecar["frames"],values[:,i,index]) if not np.isnan(v)}
+                    points.update(components.get(index,{}))
+                    components[index]=points
+        del sidecar
+        live.pop(old,None)
+        shutil.rmtree(old,ignore_errors=True)
+    frames=sorted(set(f for discrete,components in tracks.values() for points in components.values() for f in points))
+    row={f:k for k,f in enumerate(frames)}
+    #items of a group share their length, e.g. the colour and float inputs of one node are kept apart
+    groups={}
+    for (key,item),(discrete,components) in tracks.items():
+        size=max(components)+1
+        group=groups.setdefault(key+(size,discrete),{"discrete":discrete,"items":{},"components":size})
+        group["items"][item]=components
+    os.makedirs(folder,exist_ok=True)
+    folder=tempfile.mkdtemp(prefix="net2blend_",dir=folder)
+    meta={"collections":collections,"groups":[]}
+    for k,(key,group) in enumerate(sorted(groups.items(),key=lambda g:str(g[0]))):
+        items=sorted(group["items"])
+        values=np.full((len(frames),len(items),group["components"]),np.nan,dtype=np.float32)
+        for i,item in enumerate(items):
+            for index,points in group["items"][item].items():
+                values[[row[f] for f in points],i,index]=list(points.values())
+        np.save(os.path.join(folder,"g%d.npy"%k),held_values(values))
+        entry={"file":"g%d.npy"%k,"kind":key[0],"collection":key[1],"discrete":group["discrete"],
+            "components":group["components"]}
+        if key[0]=="items":
+            entry.update({"name":key[2],"path":key[3],"prop":key[4],"items":items})
+        else:
+            entry.update({"path":key[2],"items":items})
+        meta["groups"].append(entry)
+    np.save(os.path.join(folder,"frames.npy"),np.array(frames,dtype=float))
+    with open(os.path.join(folder,"live.json"),"w") as f:
+        json.dump(meta,f)
+    #relative to the .blend file when it has been saved, so the folder can move with it
+    path=bpy.path.relpath(folder) if bpy.data.filepath else folder
+    scene["net2blend_live"]=kept+[path]
+
+def live_network(owners):
+    #collections of the objects a sidecar animates, a later sidecar of any of them replaces it
+    return sorted({c.name for owner in owners.values() if isinstance(owner,bpy.types.Object)
+        for c in owner.users_collection})
+
+#sidecar folders read by the frame change handler, with their arrays memory-mapped
+live={}
+
+def live_sidecar(folder):
+    sidecar=live.get(folder)
+    if sidecar is None:
+        with open(os.path.join(folder,"live.json")) as f:
+            meta=json.load(f)
+        sidecar={"frames":np.load(os.path.join(folder,"frames.npy")).tolist(),"groups":meta["groups"],
+            "collections":meta.get("collections",[]),
+            "values":[np.load(os.path.join(folder,g["file"]),mmap_mode="r") for g in meta["groups"]]}
+        live[folder]=sidecar
+    return sidecar
+
+def live_values(frames,values,frame,discrete):
+    #values at a frame, interpolated between timesteps unless they are discrete
+    k=bisect.bisect_right(frames,frame)-1
+    if k<0:
+        return np.asarray(values[0])
+    if discrete or k+1>=len(frames):
+        return np.asarray(values[k])
+    t=(frame-frames[k])/(frames[k+1]-frames[k])
+    return values[k]*(1-t)+values[k+1]*t
+
+def live_whole(items,group,current):
+    #whether a group can be written with one foreach_set: every item of the collection,
+    #each with all of its components keyed
+    if group["items"]!=list(range(len(items))) or not len(items) or np.isnan(current).any():
+        return False
+    length=items[0].bl_rna.properties[group["prop"]].array_length
+    return max(length,1)==group["components"]
+
+def set_live(struct,prop,value):
+    #one property of one struct from sidecar values, enums are stored by their integer value
+    if prop.startswith("["):
+        struct[prop[2:-2]]=float(value[0])
+        return
+    rnaprop=struct.bl_rna.properties[prop]
+    if rnaprop.type=='ENUM':
+        value=[item.identifier for item in rnaprop.enum_items if item.value==int(round(value[0]))][0]
+    elif rnaprop.type in ('BOOLEAN','INT'):
+        value=[int(round(v)) for v in value]
+    else:
+        value=[float(v) for v in value]
+    if rnaprop.type!='ENUM' and getattr(rnaprop,"array_length",0)==0:
+        value=value[0]
+    setattr(struct,prop,value)
+
+def apply_live(scene,frame):
+    #write the values of every sidecar of the scene at a frame, later imports over earlier ones
+    sidecars=[]
+    for path in scene.get("net2blend_live",[]):
+        folder=bpy.path.abspath(path)
+        if os.path.isfile(os.path.join(folder,"live.json")):
+            sidecars.append(live_sidecar(folder))
+    sidecars.sort(key=lambda sidecar:sidecar["frames"][0])
+    #a frame before every sidecar shows the first one
+    sidecars=sidecars[:1]+[sidecar for sidecar in sidecars[1:] if sidecar["frames"][0]<=frame]
+    touched={}
+    for sidecar in sidecars:
+        for group,values in zip(sidecar["groups"],sidecar["values"]):
+            data=getattr(bpy.data,group["collection"])
+            current=live_values(sidecar["frames"],values,frame,group["discrete"])
+            if group["kind"]=="items":
+                owner=data.get(group["name"])
+                if owner is None:
+                    continue
+                touched[owner.as_pointer()]=owner
+                items=owner.path_resolve(group["path"])
+                if live_whole(items,group,current):
+                    #one call for the whole collection
+                    if group["discrete"]:
+                        items.foreach_set(group["prop"],np.rint(current).astype(int).ravel().tolist())
+                    else:
+                        items.foreach_set(group["prop"],np.ascontiguousarray(current,dtype=np.float32).ravel())
+                else:
+                    for item,value in zip(group["items"],current):
+                        set_live(items[item],group["prop"],value)
+            else:
+                parent,dot,prop=group["path"].rpartition(".")
+                for name,value in zip(group["items"],current):
+                    owner=data.get(name)
+                    if owner is None:
+                        continue
+                    touched[owner.as_pointer()]=owner
+                    set_live(owner.path_resolve(parent) if parent else owner,prop,value)
+    for owner in touched.values():
+        owner.update_tag()
+
+@persistent
+def live_frame_change(scene,depsgraph=None):
+    if "net2blend_live" in scene and np is not None:
+        apply_live(scene,scene.frame_current)
+
+def live_folder(netimp):
+    if netimp.livepath:
+        return bpy.path.abspath(netimp.livepath)
+    if bpy.data.filepath:
+        return bpy.path.abspath("//net2blend_live")
+    #a temporary folder would be lost while the file still refers to it
+    raise NetImportError("Save the .blend file or set a live sidecar folder before a live import")
+
+def keyframe_writer(mode,tolerance=None,livepath=""):
+    if mode=='INSERT':
+        return KeyframeWriter(tolerance)
+    if mode=='LIVE':
+        return LiveKeyframeWriter(tolerance,livepath)
+    return BulkKeyframeWriter(tolerance)
+
+def scene_keyframe_writer(netimp):
+    #keyframe writer set up from the import options
+    if netimp.keymode=='LIVE' and np is None:
+        raise NetImportError("Live animation needs numpy")
+    return keyframe_writer(netimp.keymode,netimp.keytolerance if netimp.changedbool else None,live_folder(netimp))
+
+def folder_timesteps(folderpath,sortbool=False,framebool=False,frameint=1):
+    #(frame, edata path, vdata path) of every network in a folder, in import order
+    files=os.listdir(folderpath)
+    fullfiles=[os.path.join(folderpath,f) for f in files]
+    if sortbool:
+        filenames=[f.split("_")[-2] for f in files]
+
+        fullfiles=[x for _, x in sorted(zip(filenames, fullfiles))]
+        log.debug("files: %s",fullfiles)
+    else:
+        fullfiles.sort(key=os.path.getmtime)
+    edatafiles = [f for f in fullfiles if "edata" in f]
+    vdatafiles = [f for f in fullfiles if "vdata" in f]
+    steps=[]
+    for file in range(0,len(edatafiles)):
+        edatapath=edatafiles[file]
+        if framebool:
+            cframe=int(edatapath.split("_")[-2])
+        else:
+            cframe=file*frameint
+        steps.append((cframe,edatapath,vdatafiles[file]))
+    return steps
+
+def read_timestep(paths):
+    #parse one timestep and work out its edge geometry, no bpy calls so it can run in a worker
+    vdatapath,edatapath,cachepath=paths
+    vtable=load_table(vdatapath,vertex_columns,cachepath)
+    etable=load_table(edatapath,edge_columns,cachepath)
+    return vtable,etable,edge_geometry(etable)
+
+def read_timesteps(steps,workers=0,cachepath=""):
+    #read_timestep for every (frame, edata, vdata) step, through a TimestepReader pool where there is one
+    reader=TimestepReader(steps,workers,cachepath)
+    try:
+        return [reader.result(k) for k in range(len(steps))]
+    finally:
+        reader.close()
+
+def frame_column(path,column):
+    #column if the table has it, None for a table used at every timestep
+    if os.path.isdir(path):
+        header=[f[:-4] for f in os.listdir(path) if f.endswith(".npy")]
+    else:
+        with open_csv(path) as csvfile:
+            header=next(csv.reader(csvfile),[])
+    if column in header:
+        return column
+    return None
+
+def time_keys(columns):
+    #frame/time values as numbers when they all are, so 2 sorts before 10
+    try:
+        return [[float(v) for v in col] for col in columns]
+    except ValueError:
+        return [[str(v) for v in col] for col in columns]
+
+def split_rows(keys):
+    #row indices of each distinct key, in row order
+    if np is not None:
+        values,inverse=np.unique(np.asarray(keys),return_inverse=True)
+        order=np.argsort(inverse,kind="stable")
+        bounds=np.cumsum(np.bincount(inverse,minlength=len(values)))[:-1]
+        return dict(zip(values.tolist(),np.split(order,bounds)))
+    groups={}
+    for i,k in enumerate(keys):
+        groups.setdefault(k,[]).append(i)
+    return groups
+
+def take_rows(table,rows):
+    return {c:col[rows] if hasattr(col,"dtype") else [col[i] for i in rows] for c,col in table.items()}
+
+def long_timesteps(vdatapath,edatapath,column,framebool=False,cframe=0,frameint=1,cachepath=""):
+    #(frame, edata, vdata) steps and their read_timestep tables from one vertex and one edge table
+    #holding every timestep, split on a column of frame numbers or of times keyed frameint apart from cframe,
+    #a table without the column is used at every step
+    tables=[]
+    for path,columns in ((vdatapath,vertex_columns),(edatapath,edge_columns)):
+        col=frame_column(path,column)
+        tables.append((col,load_table(path,columns+([(col,str)] if col else []),cachepath)))
+    if not any(col for col,table in tables):
+        raise NetImportError("neither network table has a "+column+" column")
+    groups=[split_rows(keys) for keys in time_keys([table.pop(col) for col,table in tables if col])]
+    values=sorted(set().union(*groups))
+    if framebool:
+        try:
+            frames=[int(v) for v in values]
+        except ValueError:
+            raise NetImportError("the "+column+" column must hold whole frame numbers")
+    else:
+        frames=[cframe+k*frameint for k in range(len(values))]
+    steps=[]
+    steptables=[]
+    for frame,value in zip(frames,values):
+        parts=iter(groups)
+        vtable,etable=[take_rows(table,next(parts).get(value,[])) if col else table for col,table in tables]
+        steps.append((frame,edatapath,vdatapath))
+        steptables.append((vtable,etable,edge_geometry(etable)))
+    return steps,steptables
+
+def single_timesteps(netimp):
+    #steps of the single network paths, with their tables when they hold every timestep
+    edatapath=netimp.edatapath
+    vdatapath=netimp.vdatapath
+    if netimp.timecolumn:
+        return long_timesteps(vdatapath,edatapath,netimp.timecolumn,netimp.timeframebool,
+            netimp.cframe,netimp.frameint,bpy.path.abspath(netimp.cachepath))
+    return [(netimp.cframe,edatapath,vdatapath)],None
+
+class ImportProfile():
+    #time spent in each phase of an import and counts of what it made
+    #phases nest, time is charged to the innermost one
+
+    def __init__(self):
+        self.times={}
+        self.counts={}
+        self.stack=[]
+        self.mark=time.perf_counter()
+        self.started=self.mark
+
+    def push(self,name):
+        now=time.perf_counter()
+        if self.stack:
+            top=self.stack[-1]
+            self.times[top]=self.times.get(top,0.0)+now-self.mark
+        self.stack.append(name)
+        self.mark=now
+
+    def pop(self):
+        now=time.perf_counter()
+        top=self.stack.pop()
+        self.times[top]=self.times.get(top,0.0)+now-self.mark
+        self.mark=now
+
+    @contextmanager
+    def phase(self,name):
+        self.push(name)
+        try:
+            yield
+        finally:
+            self.pop()
+
+    def timed(self,name,func):
+        #func charged to a phase on every call
+        def wrapper(*args,**kwargs):
+            with self.phase(name):
+                return func(*args,**kwargs)
+        return wrapper
+
+    def timed_iter(self,name,items):
+        #items, with the time taken to produce each charged to a phase
+        items=iter(items)
+        while True:
+            with self.phase(name):
+                item=next(items,None)
+            if item is None:
+                return
+            yield item
+
+    def count(self,name,n=1):
+        self.counts[name]=self.counts.get(name,0)+n
+
+    def report(self):
+        return {"version":".".join(str(v) for v in bl_info["version"]),
+                "total":time.perf_counter()-self.started,
+                "phases":dict(self.times),
+                "counts":dict(self.counts)}
+
+    def summary(self):
+        report=self.report()
+        lines=["%-12s %10s"%("phase","seconds")]
+        for name,secs in sorted(report["phases"].items(),key=lambda p:-p[1]):
+            lines.append("%-12s %10.3f"%(name,secs))
+        lines.append("%-12s %10.3f"%("total",report["total"]))
+        for name,n in sorted(report["counts"].items()):
+            lines.append("%-12s %10d"%(name,n))
+        return "\n".join(lines)
+
+    def write_json(self,path):
+        with open(path,"w") as f:
+            json.dump(self.report(),f,indent=2)
+
+class ProfiledKeys():
+    #keyframe writer that charges its time to the keyframing phase
+
+    def __init__(self,keys,profile):
+        self.keys=keys
+        self.profile=profile
+
+    def insert(self,struct,prop,frame):
+        self.profile.push("keyframing")
+        try:
+            self.keys.insert(struct,prop,frame)
+        finally:
+            self.profile.pop()
+
+    def flush(self):
+        with self.profile.phase("keyframing"):
+            self.keys.flush()
+
+def finish_profile(profile,netimp,keys,counts):
+    #counts of what the import made, then the summary in the log and optionally as JSON
+    profile.count("objects",len(bpy.data.objects)-counts[0])
+    profile.count("materials",len(bpy.data.materials)-counts[1])
+    profile.count("keyframes",keys.count)
+    profile.count("skipped keys",keys.suppressed)
+    log.info("import profile\n"+profile.summary())
+    if netimp.profilepath:
+        profile.write_json(bpy.path.abspath(netimp.profilepath))
+
+def table_slice(table,start,stop):
+    #rows start to stop of a table or edge_geometry
+    return {c:col[start:stop] for c,col in table.items()}
+
+class TimestepReader():
+    #read_timestep for each step in worker processes, results taken in step order as they finish
+
+    def __init__(self,steps,workers=0,cachepath="",tables=None):
+        self.paths=[(vdatapath,edatapath,cachepath) for cframe,edatapath,vdatapath in steps]
+        #tables already read, e.g. split from tables holding every timestep
+        self.tables=tables
+        if workers==0:
+            workers=os.cpu_count() or 1
+        workers=min(workers,len(self.paths))
+        self.pool=None
+        #workers are forked so they share the loaded add-on, which is only safe on linux,
+        #elsewhere the folder is read here
+        if tables is None and workers>1 and sys.platform.startswith("linux"):
+            self.pool=ProcessPoolExecutor(workers,mp_context=multiprocessing.get_context("fork"))
+            self.futures=[self.pool.submit(read_timestep,p) for p in self.paths]
+
+    def ready(self,k):
+        return self.pool is None or self.futures[k].done()
+
+    def result(self,k):
+        if self.tables is not None:
+            return self.tables[k]
+        if self.pool is not None:
+            try:
+                return self.futures[k].result()
+            except BrokenProcessPool:
+                log.warning("a reader process stopped, reading the remaining networks in Blender")
+                self.close()
+                self.pool=None
+        return read_timestep(self.paths[k])
+
+    def close(self):
+        if self.pool is not None:
+            for future in self.futures:
+                future.cancel()
+            self.pool.shutdown(wait=False)
+
+class NetIndex():
+    #network ids to the objects and materials built for them, read once per import
+    #from the net2blend_id/net2blend_role properties rather than from datablock names
+
+    def __init__(self,nodes,edges):
+        self.nodes=nodes
+        self.edges=edges
+        self.objects={"node":{},"edge":{},"arrowhead":{},"points":{},"merged":{}}
+        self.materials={}
+        self.dashnodes={}
+        #custom node shapes to the data their linked nodes share
+        self.linked={}
+        self.add_collection(nodes,"node")
+        self.add_collection(edges,"edge")
+        for mat in bpy.data.materials:
+            netid=mat.get("net2blend_id")
+            if netid is not None:
+                self.materials[(mat.get("net2blend_role"),netid)]=mat
+            elif mat.name.endswith("_mat"):
+                #materials from imports made before ids were stored
+                self.materials.setdefault((None,mat.name[:-4]),mat)
+
+    def add_collection(self,collection,role):
+        for ob in collection.objects:
+            netid=ob.get("net2blend_id")
+            objrole=ob.get("net2blend_role",role)
+            if netid is None:
+                netid=ob.name
+                if role=="edge" and netid.endswith("_ah"):
+                    objrole="arrowhead"
+                    netid=netid[:-3]
+            self.objects.setdefault(objrole,{})[netid]=ob
+            if "net2blend_linked" in ob:
+                self.linked.setdefault(ob["net2blend_linked"],ob.data)
+
+    def material(self,role,name):
+        mat=self.materials.get((role,name))
+        if mat is None:
+            mat=self.materials.get((None,name))
+        return mat
+
+    def dash_sockets(self,mat):
+        #sockets animated on a dashed edge material: colours, dash size, dash on/off
+        #and whether that last socket is the inverse alpha of an older node tree
+        key=mat.as_pointer()
+        if key not in self.dashnodes:
+            nodes=mat.node_tree.nodes
+            groups=[n for n in nodes if n.type=='GROUP' and n.node_tree is not None and n.node_tree.name.startswith("net2blend_dash")]
+            if groups:
+                group=groups[0]
+                self.dashnodes[key]=([group.inputs["Colour"]],group.inputs["Dash"],group.inputs["Dashed"],False)
+            else:
+                bsdf2=nodes["Principled BSDF.001"]
+                self.dashnodes[key]=([nodes["Principled BSDF"].inputs[0],bsdf2.inputs[0]],
+                    nodes["Math"].inputs[1],bsdf2.inputs["Alpha"],True)
+        return self.dashnodes[key]
+
+class MissingKeys():
+    #keys nodes and edges missing from a timestep as gone, only on the frames they disappear and
+    #reappear, so networks need no placeholder rows for them. nodes and edges drawn as points of
+    #an instanced mesh or splines of a merged curve can't be hidden on their own, so are scaled to zero
+
+    def __init__(self,mode):
+        self.mode=mode
+        self.first=None
+        self.last=None
+        #entities keyed this import and those currently missing
+        self.seen=set()
+        self.missing=set()
+        #entities keyed visible this import
+        self.shown=set()
+
+    def entities(self,index):
+        #(key, network id, from the edge table, object, point or spline number) of everything built
+        for role in ("node","edge","arrowhead"):
+            for netid,ob in index.objects[role].items():
+                yield (role,netid),netid,role!="node",ob,None
+        for role,edge in (("points",False),("merged",True)):
+            for name,ob in index.objects[role].items():
+                for k,netid in enumerate(ob["net2blend_names"]):
+                    yield (role,name,netid),netid,edge,ob,k
+
+    def key_zero(self,keys,struct,prop,zero,frame):
+        #key a zero size without changing the value the import left
+        value=getattr(struct,prop)
+        if hasattr(value,"__len__"):
+            value=tuple(value)
+        setattr(struct,prop,zero)
+        keys.insert(struct,prop,frame)
+        setattr(struct,prop,value)
+
+    def hide(self,keys,ob,k,frame,shown=None):
+        #shown is a frame the entity was still there at when it disappears for the first time,
+        #keyed visible so constant extrapolation doesn't hide it before then as well
+        if k is None and self.mode=='HIDE':
+            if shown is not None and shown<frame:
+                ob.hide_viewport=ob.hide_render=False
+                keys.insert(ob,"hide_viewport",shown)
+                keys.insert(ob,"hide_render",shown)
+            ob.hide_viewport=ob.hide_render=True
+            keys.insert(ob,"hide_viewport",frame)
+            keys.insert(ob,"hide_render",frame)
+        elif k is None:
+            self.key_zero(keys,ob,"scale",(0,0,0),frame)
+        elif ob["net2blend_role"]=="merged":
+            for bp in ob.data.splines[k].bezier_points:
+                self.key_zero(keys,bp,"radius",0,frame)
+        else:
+            self.key_zero(keys,ob.data.attributes["size"].data[k],"value",0,frame)
+
+    def show(self,keys,ob,k,frame,lastmissing):
+        #the import keyed the entity at frame, sizes are held at zero until the last frame it was missing
+        if k is None and self.mode=='HIDE':
+            ob.hide_viewport=ob.hide_render=False
+            keys.insert(ob,"hide_viewport",frame)
+            keys.insert(ob,"hide_render",frame)
+        elif lastmissing is not None:
+            self.hide(keys,ob,k,lastmissing)
+
+    def hidden_before(self,ob):
+        #hidden at some frames by an earlier import
+        anim=ob.animation_data
+        return anim is not None and anim.action is not None and anim.action.fcurves.find("hide_viewport") is not None
+
+    def first_key(self,ob):
+        #first frame an entity from an earlier import was keyed at, when it has no visibility keys yet
+        if self.hidden_before(ob) or ob.animation_data is None or ob.animation_data.action is None:
+            return None
+        frames=[fc.keyframe_points[0].co[0] for fc in ob.animation_data.action.fcurves if len(fc.keyframe_points)]
+        return min(frames) if frames else None
+
+    def step(self,index,vertices,edges,keys,frame):
+        #key what changed at a timestep once all of it is imported, vertices and edges are its names
+        if self.mode=='KEEP' or index is None:
+            return
+        if self.first is None:
+            self.first=frame
+        for key,netid,edge,ob,k in self.entities(index):
+            present=netid in (edges if edge else vertices)
+            if key not in self.seen:
+                self.seen.add(key)
+                if self.last is None:
+                    if not present:
+                        self.hide(keys,ob,k,frame,self.first_key(ob) if k is None else None)
+                        self.missing.add(key)
+                    elif k is None and self.mode=='HIDE' and self.hidden_before(ob):
+                        self.show(keys,ob,k,frame,None)
+                    continue
+                #built after the first timestep
+                self.hide(keys,ob,k,self.first)
+                self.missing.add(key)
+            if present and key in self.missing:
+                self.show(keys,ob,k,frame,self.last)
+                self.missing.discard(key)
+                self.shown.add(key)
+            elif not present and key not in self.missing:
+                #only the first disappearance needs the visible key, later ones follow a reappearance
+                self.hide(keys,ob,k,frame,self.last if key not in self.shown else None)
+                self.missing.add(key)
+        self.last=frame
 
 class importnet():
     
-    def __init__(self,context,edatapath,vdatapath,cframe):
+    def __init__(self,context,edatapath,vdatapath,cframe,keys=None,vtable=None,etable=None,index=None,geometry=None,profile=None):
         self.context=context
         self.edatapath=edatapath
         self.vdatapath=vdatapath
         self.cframe=cframe
+        #a shared writer is flushed by its owner, otherwise do_import flushes its own
+        self.keys=keys
+        #tables already read with read_table, otherwise the paths are parsed
+        self.vtable=vtable
+        self.etable=etable
+        #NetIndex of the network, otherwise built from its collections
+        self.index=index
+        #edge_geometry of etable, otherwise worked out during the import
+        self.geometry=geometry
+        #ImportProfile shared by the whole operator, otherwise one for this import
+        self.profile=profile
         
 
         
@@ -105,615 +1615,681 @@ class importnet():
         edatapath=self.edatapath
         vdatapath=self.vdatapath
         cframe=self.cframe
+        keys=self.keys
+        if keys is None:
+            keys=scene_keyframe_writer(scene.netimport)
+        profile=self.profile
+        if profile is None:
+            profile=ImportProfile()
+            self.profile=profile
+        keys=ProfiledKeys(keys,profile)
         
-        def add_arrowhead(v0, v1, ered,egreen,eblue,edgename='edge',toshorten=0,fromshorten=0,arrowlength=0,arrowsize=0,ecurve=0,forcecurve=False,edge3d=True):
+        def add_arrowhead(end,rotation,ered,egreen,eblue,edgename='edge',arrowlength=0,arrowsize=0,edge3d=True):
             edgename=str(edgename)
-            curved=(ecurve>0)|forcecurve
-            v0, v1 = Vector(v0), Vector(v1)  
-            #backup original coords
-            v02=v0
-            v01=v1
+            ah=bpy.data.objects.new(edgename+'_ah',shape_mesh("cone"))
+            ah.scale.x=arrowsize
+            ah.scale.y=arrowsize
+            ah.scale.z=arrowlength
+            ah.location=end
+            if not edge3d:
+                ah.scale.x=0.00001
+            ah.rotation_mode = 'QUATERNION'
+            ah.rotation_quaternion = rotation
+            newmat=make_material(edgename+'_ah',ered,egreen,eblue,role="arrowhead",obj=ah)
+            ah.material_slots[0].link='OBJECT'
+            ah.material_slots[0].material=newmat
+            keys.insert(ah,"location",cframe)
+            keys.insert(ah,"scale",cframe)
+            keys.insert(ah,"rotation_quaternion",cframe)
+            ah["net2blend_id"]=edgename
+            ah["net2blend_role"]="arrowhead"
+            index.objects["arrowhead"][edgename]=ah
+            newedges.append(ah)
             
-            toshorten=toshorten+arrowlength
-            vec1=(v1-v0)
-            vec1.normalize()
-            v0=v0+(vec1*fromshorten)
-            v1=v0+(vec1*((v1-v0).length-toshorten))
-
-            o = (v1 + v0) / 2  
-            if curved:
-                vsize=[abs(i) for i in list(v1-v0)]
-                res = len(vsize) - 1 - vsize[::-1].index(min(vsize))        
-                curvev=[0,0,0]
-                curvev[res]=1
-                curvev=Vector(curvev)        
-                
-                dir = v1-v0
-                dir2 = dir.cross(curvev)
-                dir2.normalize()
-                v2=o+(dir2*ecurve )
-            else:
-                v2=v1
-            avec=v01-v2
-            #avec.normalized()
-            
-            bpy.ops.mesh.primitive_cone_add(radius2=0,end_fill_type='TRIFAN')
-            bpy.context.object.scale.x=arrowsize
-            bpy.context.object.scale.y=arrowsize
-            bpy.context.object.scale.z=arrowlength
-            bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='MEDIAN')
-            bpy.context.object.location=v1
-            if edge3d == 'FALSE':
-                bpy.context.object.scale.x=0.00001
-            bpy.context.object.rotation_mode = 'QUATERNION'
-            bpy.context.object.rotation_quaternion = avec.to_track_quat('Z', 'X')
-            newmat=make_material(edgename+'_ah',ered,egreen,eblue)
-            bpy.context.object.data.materials.append(newmat)
-            bpy.context.object.name=edgename+'_ah'
-            bpy.context.object.data.name=edgename+'_ah'
-            bpy.context.object.keyframe_insert(data_path="location", frame=cframe)
-            bpy.context.object.keyframe_insert(data_path="scale", frame=cframe)
-            bpy.context.object.keyframe_insert(data_path="rotation_quaternion", frame=cframe)
-            #edges.objects.link(bpy.context.object)
-            
-        def move_arrowhead(v0, v1, ered,egreen,eblue,edgename='edge',toshorten=0,fromshorten=0,arrowlength=0,arrowsize=0,ecurve=0,forcecurve=False,edge3d=True):
+        def move_arrowhead(end,rotation,ered,egreen,eblue,edgename='edge',arrowlength=0,arrowsize=0,edge3d=True):
             edgename=str(edgename)
-            curved=(ecurve>0)|forcecurve
-            v0, v1 = Vector(v0), Vector(v1)  
-            #backup original coords
-            v02=v0
-            v01=v1
-            
-            toshorten=toshorten+arrowlength
-            vec1=(v1-v0)
-            vec1.normalize()
-            v0=v0+(vec1*fromshorten)
-            v1=v0+(vec1*((v1-v0).length-toshorten))
-
-            o = (v1 + v0) / 2  
-            if curved:
-                vsize=[abs(i) for i in list(v1-v0)]
-                res = len(vsize) - 1 - vsize[::-1].index(min(vsize))        
-                curvev=[0,0,0]
-                curvev[res]=1
-                curvev=Vector(curvev)        
-                
-                dir = v1-v0
-                dir2 = dir.cross(curvev)
-                dir2.normalize()
-                v2=o+(dir2*ecurve )
-            else:
-                v2=v1
-            avec=v01-v2
-            
-            old_obj=edges.objects[edgename+'_ah']
-            old_obj.location=v1
+            old_obj=index.objects["arrowhead"][edgename]
+            old_obj.location=end
             old_obj.scale.x=arrowsize
             old_obj.scale.y=arrowsize
             old_obj.scale.z=arrowlength
-            if edge3d == 'FALSE':
+            if not edge3d:
                old_obj.scale.x=0.00001
-            old_obj.rotation_quaternion = avec.to_track_quat('Z', 'X')
-            modify_material(edgename,ered,egreen,eblue)
-            old_obj.keyframe_insert(data_path="location", frame=cframe)
-            old_obj.keyframe_insert(data_path="scale", frame=cframe)
-            old_obj.keyframe_insert(data_path="rotation_quaternion", frame=cframe)
-            
-        def add_bezier(v0 , v1,edgename='edge',ecurve=0,forcecurve=False,toshorten=0,fromshorten=0,arrowlength=0):
-            curved=(ecurve>0)|forcecurve
-            v0, v1 = Vector(v0), Vector(v1)  
-            #backup original coords
-            v02=v0
-            v01=v0
-            toshorten=toshorten+arrowlength
-            
-            
-            vec1=(v1-v0)
-            vec1.normalize()
-            v0=v0+(vec1*fromshorten)
-            v1=v0+(vec1*((v1-v0).length-toshorten))
+            old_obj.rotation_quaternion = rotation
+            modify_material(edgename+'_ah',ered,egreen,eblue,role="arrowhead",obj=old_obj)
+            keys.insert(old_obj,"location",cframe)
+            keys.insert(old_obj,"scale",cframe)
+            keys.insert(old_obj,"rotation_quaternion",cframe)
+
+        def set_bezier_points(spline,start,control,end,mid,curved):
+            #points are relative to the curve object, which sits at the edge midpoint
+            o=Vector(mid)
+            if len(spline.bezier_points)>2:
+                points=[start,control if curved else mid,end]
+            else:
+                points=[start,end]
+            for bp,co in zip(spline.bezier_points,points):
+                bp.co = Vector(co) - o
+                bp.handle_left_type = bp.handle_right_type = 'AUTO'
+            for bp in spline.bezier_points:
+                keys.insert(bp,"co",cframe)
+                keys.insert(bp,"handle_right",cframe)
+                keys.insert(bp,"handle_left",cframe)
+                keys.insert(bp,"handle_right_type",cframe)
+                keys.insert(bp,"handle_left_type",cframe)
             
-            o = (v1 + v0) / 2  
-            if curved:
-                if ecurve>0:
-                    vsize=[abs(i) for i in list(v1-v0)]
-                    res = len(vsize) - 1 - vsize[::-1].index(min(vsize))        
-                    curvev=[0,0,0]
-                    curvev[res]=1
-                    curvev=Vector(curvev)        
-                    
-                    dir = v1-v0
-                    dir2 = dir.cross(curvev)
-                    dir2.normalize()
-                    v2=o+(dir2*ecurve )
-                else:
-                    v2=o
+        def add_bezier(start,control,end,mid,curved,edgename='edge'):
             curve = bpy.data.curves.new(edgename, 'CURVE')
             spline = curve.splines.new('BEZIER')
-            bp0 = spline.bezier_points[0]
-            bp0.co = v0 - o
-            bp0.handle_left_type = bp0.handle_right_type = 'AUTO'
-
-            
-            if curved:
-                spline.bezier_points.add(count=1)
-                bp2 = spline.bezier_points[1]
-
-                bp2.co = v2 - o
-
-                bp2.handle_left_type = bp2.handle_right_type = 'AUTO'
-
-                
-            spline.bezier_points.add(count=1)
-            bp1 = spline.bezier_points[len(spline.bezier_points)-1]
-            bp1.co = v1 - o
-            bp1.handle_left_type = bp1.handle_right_type = 'AUTO'
-
-            bp0 = spline.bezier_points[0]
-            bp0.keyframe_insert(data_path="co", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_right", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_left", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_right_type", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_left_type", frame=cframe)
-            
-            if curved:
-                bp2 = spline.bezier_points[1]
-                bp2.keyframe_insert(data_path="co", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_right", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_left", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_right_type", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_left_type", frame=cframe)
-            
-            bp1 = spline.bezier_points[len(spline.bezier_points)-1]
-            bp1.keyframe_insert(data_path="co", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_right", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_left", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_right_type", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_left_type", frame=cframe)
+            spline.bezier_points.add(count=2 if curved else 1)
+            set_bezier_points(spline,start,control,end,mid,curved)
             
             ob = bpy.data.objects.new(edgename, curve)
             #ob.data.use_uv_as_generated = True
 
-            ob.matrix_world.translation = o
-            ob.keyframe_insert(data_path="scale", frame=cframe)
-            ob.keyframe_insert(data_path="location", frame=cframe)
-            ob.keyframe_insert(data_path="rotation_euler", frame=cframe)
+            ob.matrix_world.translation = mid
+            keys.insert(ob,"scale",cframe)
+            keys.insert(ob,"location",cframe)
+            keys.insert(ob,"rotation_euler",cframe)
             return ob
 
-        def modify_bezier(v0,v1,edgename='edge',ecurve=0,forcecurve=False,toshorten=0,fromshorten=0,arrowlength=0):
-            curved=(ecurve>0)|forcecurve
-            v0, v1 = Vector(v0), Vector(v1)  
-            #backup original coords
-            v02=v0
-            v01=v0
-            toshorten=toshorten+arrowlength
+        def modify_bezier(start,control,end,mid,curved,edgename='edge'):
+            old_obj=index.objects["edge"][edgename]
+            set_bezier_points(old_obj.data.splines.active,start,control,end,mid,curved)
             
-            vec1=(v1-v0)
-            vec1.normalize()
-            v0=v0+(vec1*fromshorten)
-            v1=v0+(vec1*((v1-v0).length-toshorten))
-
-            o = (v1 + v0) / 2  
-            if curved:
-                if ecurve>0:
-                    vsize=[abs(i) for i in list(v1-v0)]
-                    res = len(vsize) - 1 - vsize[::-1].index(min(vsize))        
-                    curvev=[0,0,0]
-                    curvev[res]=1
-                    curvev=Vector(curvev)        
-                    
-                    dir = v1-v0
-                    dir2 = dir.cross(curvev)
-                    dir2.normalize()
-                    v2=o+(dir2*ecurve )
-                else:
-                    v2=o
-            old_obj=edges.objects[ename]
-            bp0 = old_obj.data.splines.active.bezier_points.values()[0]
-            bp0.co = v0 - o
-            bp0.handle_left_type = bp0.handle_right_type = 'AUTO'
-
-
-            if curved:
-                bp2 = old_obj.data.splines.active.bezier_points.values()[1]
-
-                bp2.co = v2 - o
-
-                bp2.handle_left_type = bp2.handle_right_type = 'AUTO'
-                
-
-            
-            bp1 = old_obj.data.splines.active.bezier_points.values()[len(old_obj.data.splines.active.bezier_points.values())-1]
-            bp1.co = v1 - o
-            
-            bp1.handle_left_type = bp1.handle_right_type = 'AUTO'
-            
-            bp0 = old_obj.data.splines.active.bezier_points.values()[0]
-            bp0.keyframe_insert(data_path="co", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_right", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_left", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_right_type", frame=cframe)
-            bp0.keyframe_insert(data_path="handle_left_type", frame=cframe)
-            
-            if curved:
-                print("Add curve keyframe")
-                bp2 = old_obj.data.splines.active.bezier_points.values()[1]
-                bp2.keyframe_insert(data_path="co", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_right", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_left", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_right_type", frame=cframe)
-                bp2.keyframe_insert(data_path="handle_left_type", frame=cframe)
-            
-            bp1 = old_obj.data.splines.active.bezier_points.values()[len(old_obj.data.splines.active.bezier_points.values())-1]
-            bp1.keyframe_insert(data_path="co", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_right", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_left", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_right_type", frame=cframe)
-            bp1.keyframe_insert(data_path="handle_left_type", frame=cframe)
-            
-            old_obj.matrix_world.translation = o
-            old_obj.keyframe_insert(data_path="scale", frame=cframe)
-            old_obj.keyframe_insert(data_path="location", frame=cframe)
-            old_obj.keyframe_insert(data_path="rotation_euler", frame=cframe)
+            old_obj.matrix_world.translation = mid
+            keys.insert(old_obj,"scale",cframe)
+            keys.insert(old_obj,"location",cframe)
+            keys.insert(old_obj,"rotation_euler",cframe)
             return old_obj
 
-        def make_material(name,cr,cg,cb,cd=0,forcedash=False):
+        def colour_object(obj,cr,cg,cb,cd=0,forcedash=False):
+            #colour and dash settings read by the shared materials
+            obj.color=(float(cr), float(cg), float(cb), 1)
+            keys.insert(obj,"color",cframe)
+            if (cd>0)|forcedash or "net2blend_dash" in obj:
+                obj["net2blend_dash"]=float(cd)
+                obj["net2blend_dashed"]=float(forcedash)
+                keys.insert(obj,'["net2blend_dash"]',cframe)
+                keys.insert(obj,'["net2blend_dashed"]',cframe)
+
+        def make_material(name,cr,cg,cb,cd=0,forcedash=False,role="node",obj=None):
             i=(name+"_mat")
             dash=(cd>0)|forcedash
-            print('material '+i)
-            if i not in bpy.data.materials:
-                print('created')
+            if sharedmat and obj is not None:
+                obj["net2blend_shared"]=True
+                colour_object(obj,cr,cg,cb,cd,forcedash)
+                if dash not in sharedmats:
+                    sharedmats[dash]=shared_material(dash)
+                return sharedmats[dash]
+            log.debug('material '+i)
+            mat=index.material(role,name)
+            if mat is None:
+                log.debug('created')
+                mat = bpy.data.materials.new(name=i)
+                mat["net2blend_id"]=name
+                mat["net2blend_role"]=role
+                index.materials[(role,name)]=mat
                 if not dash:
-                    mat = bpy.data.materials.new(name=i)
                     mat.diffuse_color = (float(cr), float(cg), float(cb), 1)
-                    mat.keyframe_insert(data_path="diffuse_color",frame=cframe)
+                    keys.insert(mat,"diffuse_color",cframe)
                     return mat
                 else:
-                    #make material
-                    mat = bpy.data.materials.new(name=i)
-                    bpy.data.materials[i].use_nodes=True
-                    bpy.data.materials[i].blend_method='HASHED'
-                    bpy.data.materials[i].shadow_method='HASHED'
-                    
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeTexChecker")
-                    
-                    bpy.data.materials[i].node_tree.nodes["Checker Texture"].inputs[3].default_value = (1)                    
-                    
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeMixShader")
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeBsdfPrincipled")
-
-                    #link to Mix texture
-                    outp=bpy.data.materials[i].node_tree.nodes["Checker Texture"].outputs["Fac"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Mix Shader"].inputs["Fac"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-
-                    outp=bpy.data.materials[i].node_tree.nodes["Principled BSDF"].outputs["BSDF"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Mix Shader"].inputs[1]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].outputs["BSDF"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Mix Shader"].inputs[2]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF"].inputs[0].default_value=(float(cr), float(cg), float(cb), 1)
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[0].default_value=(float(cr), float(cg), float(cb), 1)
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF"].inputs[0].keyframe_insert(data_path="default_value",frame=cframe)                    
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[0].keyframe_insert(data_path="default_value",frame=cframe)
-                    
-                    if forcedash:
-                        bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].default_value=0
-                    else:
-                        bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].default_value=1
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].keyframe_insert(data_path="default_value",frame=cframe)
-
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeCombineXYZ")
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Combine XYZ"].outputs["Vector"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Checker Texture"].inputs["Vector"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeMath")
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeMath")
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Math"].outputs["Value"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Combine XYZ"].inputs["X"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    bpy.data.materials[i].node_tree.nodes["Math"].operation='MULTIPLY'
-                    
-                    bpy.data.materials[i].node_tree.nodes["Math"].inputs[1].default_value=cd
-                    bpy.data.materials[i].node_tree.nodes["Math"].inputs[1].keyframe_insert(data_path="default_value",frame=cframe)   
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Math.001"].outputs["Value"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Combine XYZ"].inputs["Y"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    bpy.data.materials[i].node_tree.nodes["Math.001"].operation='MULTIPLY'
-                    bpy.data.materials[i].node_tree.nodes["Math.001"].inputs[1].default_value=0
-                    
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeSeparateXYZ")
-                    outp=bpy.data.materials[i].node_tree.nodes["Separate XYZ"].outputs["Z"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Combine XYZ"].inputs["Z"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Separate XYZ"].outputs["X"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Math"].inputs[0]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-
-                    outp=bpy.data.materials[i].node_tree.nodes["Separate XYZ"].outputs["Y"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Math.001"].inputs[0]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    bpy.data.materials[i].node_tree.nodes.new(type="ShaderNodeTexCoord")                    
-
-                    outp=bpy.data.materials[i].node_tree.nodes["Texture Coordinate"].outputs["UV"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Separate XYZ"].inputs["Vector"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)
-                    
-                    outp=bpy.data.materials[i].node_tree.nodes["Mix Shader"].outputs["Shader"]
-                    inp=bpy.data.materials[i].node_tree.nodes["Material Output"].inputs["Surface"]
-                    bpy.data.materials[i].node_tree.links.new(inp,outp)                                  
+                    #make material, then key the group inputs like any later update
+                    build_dash_tree(mat)
+                    modify_material(name,cr,cg,cb,cd=cd,forcedash=forcedash,role=role)
                     return mat
             else:
-                modify_material(name,cr,cg,cb,cd=cd,forcedash=forcedash)
-                mat = bpy.data.materials[i]
+                modify_material(name,cr,cg,cb,cd=cd,forcedash=forcedash,role=role)
                 return mat
 
-        def modify_material(name,cr,cg,cb,cd=0,forcedash=False):
-            i=(name+"_mat")
-            if i not in bpy.data.materials:
+        def modify_material(name,cr,cg,cb,cd=0,forcedash=False,role="node",obj=None):
+            mat=index.material(role,name)
+            if mat is None:
+                if obj is not None and obj.get("net2blend_shared"):
+                    colour_object(obj,cr,cg,cb,cd,forcedash)
                 return
             dash=(cd>0)|forcedash
             if not dash:
-                bpy.data.materials[i].diffuse_color = (float(cr), float(cg), float(cb), 1)
-                bpy.data.materials[i].keyframe_insert(data_path="diffuse_color",frame=cframe)
+                mat.diffuse_color = (float(cr), float(cg), float(cb), 1)
+                keys.insert(mat,"diffuse_color",cframe)
             else:
-                bpy.data.materials[i].node_tree.nodes["Principled BSDF"].inputs[0].default_value=(float(cr), float(cg), float(cb), 1)
-                bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[0].default_value=(float(cr), float(cg), float(cb), 1)
-                bpy.data.materials[i].node_tree.nodes["Principled BSDF"].inputs[0].keyframe_insert(data_path="default_value",frame=cframe)                    
-                bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[0].keyframe_insert(data_path="default_value",frame=cframe)
-                if forcedash:
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].default_value=0
+                colours,dash,dashed,inverted=index.dash_sockets(mat)
+                for socket in colours:
+                    socket.default_value=(float(cr), float(cg), float(cb), 1)
+                    keys.insert(socket,"default_value",cframe)
+                dash.default_value=cd
+                keys.insert(dash,"default_value",cframe)
+                if inverted:
+                    dashed.default_value=1-float(forcedash)
                 else:
-                    bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].default_value=1
-                bpy.data.materials[i].node_tree.nodes["Math"].inputs[1].default_value=cd  
-                bpy.data.materials[i].node_tree.nodes["Principled BSDF.001"].inputs[21].keyframe_insert(data_path="default_value",frame=cframe)                    
-                bpy.data.materials[i].node_tree.nodes["Math"].inputs[1].keyframe_insert(data_path="default_value",frame=cframe)        
-        
-        
+                    dashed.default_value=float(forcedash)
+                keys.insert(dashed,"default_value",cframe)
+
+        def add_instanced_nodes(rows):
+            #all nodes as points of one mesh, instanced by geometry nodes
+            pname=vnames+'nodes_points'
+            sname=vnames+'nodes_shapes'
+            if sname not in bpy.data.collections:
+                shapes=bpy.data.collections.new(sname)
+                nodes.children.link(shapes)
+                shapes.hide_viewport=True
+                shapes.hide_render=True
+            else:
+                shapes=bpy.data.collections[sname]
+            points=index.objects["points"].get(vnames)
+            if points is None:
+                mesh=bpy.data.meshes.new(pname)
+                mesh.attributes.new("size",'FLOAT','POINT')
+                mesh.attributes.new("colour",'FLOAT_COLOR','POINT')
+                mesh.attributes.new("shape",'INT','POINT')
+                points=bpy.data.objects.new(pname,mesh)
+                points["net2blend_id"]=vnames
+                points["net2blend_role"]="points"
+                points["net2blend_names"]=[]
+                points["net2blend_shapes"]=[]
+                ng=instancer_group(vnames+'nodes_instancer',shapes)
+                mod=points.modifiers.new("net2blend_instancer",'NODES')
+                mod.node_group=ng
+                for socket,attr in (("Shape","shape"),("Size","size")):
+                    ident=group_input_id(ng,socket)
+                    mod[ident+"_use_attribute"]=True
+                    mod[ident+"_attribute_name"]=attr
+                nodes.objects.link(points)
+                index.objects["points"][vnames]=points
+            mesh=points.data
+            names=list(points["net2blend_names"])
+            shapelist=list(points["net2blend_shapes"])
+            pointids={n:k for k,n in enumerate(names)}
+
+            values=[]
+            for vname,vx, vy, vz, vshape, vsz, vred, vgreen, vblue in rows:
+                if vshape not in shapelist:
+                    #templates are named so collection info keeps them in shape order
+                    if vshape in node_shapes:
+                        #instances share one template per shape, so the automatic levels use medium
+                        lod=netimp.lod if netimp.lod not in ("SIZE","DISTANCE","BILLBOARD") else "MEDIUM"
+                        template=bpy.data.objects.new(vnames+"_shape_%03d"%len(shapelist),shape_mesh(vshape,lod))
+                        template.material_slots[0].link='OBJECT'
+                        template.material_slots[0].material=instancer_material()
+                    elif vshape in bpy.data.objects:
+                        data=bpy.data.objects[vshape].data
+                        if 'materials' in dir(data) and not data.materials:
+                            data=data.copy()
+                            data.materials.append(instancer_material())
+                        template=bpy.data.objects.new(vnames+"_shape_%03d"%len(shapelist),data)
+                    else:
+                        if vshape != "none":
+                            log.warning("object not found: "+vshape)
+                        continue
+                    shapes.objects.link(template)
+                    shapelist.append(vshape)
+                if vname not in pointids:
+                    pointids[vname]=len(names)
+                    names.append(vname)
+                values.append((pointids[vname],( vx, vy, vz ),vsz,
+                    (vred, vgreen, vblue, 1),shapelist.index(vshape)))
+
+            if len(names)>len(mesh.vertices):
+                mesh.vertices.add(len(names)-len(mesh.vertices))
+            points["net2blend_names"]=names
+            points["net2blend_shapes"]=shapelist
+            sizes=mesh.attributes["size"]
+            colours=mesh.attributes["colour"]
+            shapeids=mesh.attributes["shape"]
+            for k,co,sz,col,shape in values:
+                mesh.vertices[k].co=co
+                sizes.data[k].value=sz
+                colours.data[k].color=col
+                shapeids.data[k].value=shape
+                keys.insert(mesh.vertices[k],"co",cframe)
+                keys.insert(sizes.data[k],"value",cframe)
+                keys.insert(colours.data[k],"color",cframe)
+            mesh.update()
+
+        def merged_curve(edge3d):
+            #one curve object for all 3d edges and one for all flat edges
+            key="3d" if edge3d else "2d"
+            ob=index.objects["merged"].get(key)
+            if ob is None:
+                curve=bpy.data.curves.new(enames+'edges_'+key,'CURVE')
+                curve.dimensions = '3D'
+                #point radius carries the edge size
+                curve.bevel_depth = 1
+                curve.bevel_resolution = 3
+                ob=bpy.data.objects.new(enames+'edges_'+key,curve)
+                if not edge3d:
+                    ob.scale.z=0.00001
+                    curve.extrude=1
+                ob["net2blend_id"]=key
+                ob["net2blend_role"]="merged"
+                ob["net2blend_names"]=[]
+                index.objects["merged"][key]=ob
+                newedges.append(ob)
+            if key not in splineids:
+                splineids[key]={n:k for k,n in enumerate(ob["net2blend_names"])}
+                slotids[key]={m.as_pointer():k for k,m in enumerate(ob.data.materials) if m is not None}
+            return ob
+
+        def merged_slot(ob,mat):
+            key=ob["net2blend_id"]
+            if mat.as_pointer() not in slotids[key]:
+                slotids[key][mat.as_pointer()]=len(ob.data.materials)
+                ob.data.materials.append(mat)
+            return slotids[key][mat.as_pointer()]
+
+        def merged_edge(ename,start,control,end,mid,curved,esz,ered,egreen,eblue,edash,forcedash,edge3d):
+            ob=merged_curve(edge3d)
+            key=ob["net2blend_id"]
+            curve=ob.data
+            if ename not in splineids[key]:
+                log.debug("adding "+ename)
+                splineids[key][ename]=len(curve.splines)
+                spline=curve.splines.new('BEZIER')
+                spline.bezier_points.add(count=2 if curved else 1)
+            else:
+                log.debug("add keyframe "+ename+" "+str(cframe))
+                spline=curve.splines[splineids[key][ename]]
+            if (edash>0)|forcedash:
+                #dash size depends on edge length, so dashed edges keep their own material
+                mat=make_material(ename,ered,egreen,eblue,edash,forcedash=forcedash,role="edge")
+            else:
+                colour="%02x%02x%02x"%(int(round(ered*255)),int(round(egreen*255)),int(round(eblue*255)))
+                mat=index.material("colour",colour)
+                if mat is None:
+                    mat=bpy.data.materials.new(name="net2blend_edge_"+colour)
+                    mat.diffuse_color=(ered,egreen,eblue,1)
+                    mat["net2blend_id"]=colour
+                    mat["net2blend_role"]="colour"
+                    index.materials[("colour",colour)]=mat
+            spline.material_index=merged_slot(ob,mat)
+            keys.insert(spline,"material_index",cframe)
+            #the point count is fixed when the spline is made, as for unmerged edges
+            if len(spline.bezier_points)>2:
+                coords=[start,control if curved else mid,end]
+            else:
+                coords=[start,end]
+            for bp,co in zip(spline.bezier_points,coords):
+                bp.co=co
+                bp.handle_left_type = bp.handle_right_type = 'AUTO'
+                bp.radius=esz
+            #auto handles follow the keyed points
+            for bp in spline.bezier_points:
+                keys.insert(bp,"co",cframe)
+                keys.insert(bp,"radius",cframe)
+
         ##functions defined
+        make_material=profile.timed("materials",make_material)
+        modify_material=profile.timed("materials",modify_material)
         
         #names
-        vnames=vdatapath.split("_")[0].split("\\")[-1]
-        enames=edatapath.split("_")[0].split("\\")[-1]        
-
-        with open(vdatapath) as csvfile:
-            rdr = csv.reader( csvfile )
-            for i, row in enumerate( rdr ):
-                if i == 0: 
-                    #get column names
-                    vcolind=[]
-                    vcolind.append(row.index('name'))
-                    vcolind.append(row.index('x'))
-                    vcolind.append(row.index('y'))
-                    vcolind.append(row.index('z'))
-                    vcolind.append(row.index('colour'))
-                    vcolind.append(row.index('shape'))
-                    vcolind.append(row.index('size'))
-                    vcolind.append(row.index('red'))
-                    vcolind.append(row.index('green'))
-                    vcolind.append(row.index('blue'))
-                # else:
-                    # vname,vx, vy, vz, vcol, vshape, vsz, vred, vgreen, vblue = [row[i] for i in vcolind]
-                    # cola.append(vcol)
-                    # reda.append(vred)
-                    # bluea.append(vblue)
-                    # greena.append(vgreen)
-
-        # #get all edge colours            
-        with open(edatapath) as csvfile:
-            rdr = csv.reader( csvfile )
-            for i, row in enumerate( rdr ):
-                #if i == 0: continue # Skip column titles
-                if i == 0: 
-                    #get column names
-                    ecolind=[]
-                    ecolind.append(row.index('from_name'))
-                    ecolind.append(row.index('to_name'))
-                    ecolind.append(row.index('size'))
-                    ecolind.append(row.index('colour'))
-                    ecolind.append(row.index('from_x'))
-                    ecolind.append(row.index('from_y'))
-                    ecolind.append(row.index('from_z'))
-                    ecolind.append(row.index('to_x'))
-                    ecolind.append(row.index('to_y'))
-                    ecolind.append(row.index('to_z')) 
-                    ecolind.append(row.index('red'))
-                    ecolind.append(row.index('green'))
-                    ecolind.append(row.index('blue'))  
-                    ecolind.append(row.index('curve'))
-                    ecolind.append(row.index('forcecurve'))
-                    ecolind.append(row.index('from_shorten'))
-                    ecolind.append(row.index('to_shorten'))
-                    ecolind.append(row.index('arrowlength'))
-                    ecolind.append(row.index('arrowsize'))     
-                    ecolind.append(row.index('is3d'))   
-                    ecolind.append(row.index('dash'))
-                    ecolind.append(row.index('isdashed'))
-                    ecolind.append(row.index('name'))
-
+        vnames=os.path.basename(vdatapath).split("_")[0]
+        enames=os.path.basename(edatapath).split("_")[0]        
+
+        #both tables are parsed and checked before the scene is touched
+        profile.push("parse")
+        vtable=self.vtable
+        if vtable is None:
+            vtable=load_table(vdatapath,vertex_columns,bpy.path.abspath(scene.netimport.cachepath))
+        etable=self.etable
+        if etable is None:
+            etable=load_table(edatapath,edge_columns,bpy.path.abspath(scene.netimport.cachepath))
+        profile.pop()
 
         #add nodes
+        profile.push("objects")
         if (vnames+'nodes') not in bpy.data.collections:
             nodes = bpy.data.collections.new((vnames+'nodes'))
-            bpy.context.scene.collection.children.link(nodes)
+            scene.collection.children.link(nodes)
         else:
             nodes=bpy.data.collections[(vnames+'nodes')]
-        bpy.context.view_layer.active_layer_collection = \
-        bpy.context.view_layer.layer_collection.children[(vnames+'nodes')]    
-        with open(vdatapath) as csvfile:
-            rdr = csv.reader( csvfile )
-            for i, row in enumerate( rdr ):
-                if i == 0:continue 
-
-                vname,vx, vy, vz, vcol, vshape, vsz, vred, vgreen, vblue = [row[i] for i in vcolind]
-                if vname not in nodes.objects:
-                    print("adding "+vname+" "+str(i))
-                    if vshape in ["sphere","cube","circle","square"]:
-                        
-                        if vshape == "sphere":
-                            bpy.ops.mesh.primitive_uv_sphere_add(location = ( float(vx), float(vy), float(vz) ))
-                        elif vshape == "cube":
-                            bpy.ops.mesh.primitive_cube_add(location = ( float(vx), float(vy), float(vz) ))
-                        elif vshape == "circle":
-                            bpy.ops.mesh.primitive_circle_add(location = ( float(vx), float(vy), float(vz) ), fill_type="TRIFAN")
-                        elif vshape == "square":
-                            bpy.ops.mesh.primitive_plane_add(location = ( float(vx), float(vy), float(vz) ))
-                        bpy.context.object.scale=(float(vsz),float(vsz),float(vsz))
-                        newmat=make_material(vname,vred,vgreen,vblue)
-                        bpy.context.object.data.materials.append(newmat)
-                        bpy.context.object.name=vname
-                        bpy.context.object.data.name=vname
-                        bpy.context.object.keyframe_insert(data_path="location", frame=cframe)
-                        bpy.context.object.keyframe_insert(data_path="scale", frame=cframe)
-                        #nodes.objects.link(bpy.context.object)
-                    else:
-                        if vshape not in bpy.data.objects: 
-                            if vshape is not "none":
-                                print("object not found")
-                            continue
-
-                        new_obj = bpy.data.objects[vshape].copy()
-                        new_obj.data = bpy.data.objects[vshape].data.copy()
-                        new_obj.name=vname
-                        new_obj.data.name=vname
-                        new_obj.location=( float(vx), float(vy), float(vz) )
-                        new_obj.scale=(float(vsz),float(vsz),float(vsz))
-                        if 'materials' in dir(new_obj.data) and not new_obj.data.materials:
-                            newmat=make_material(vname,vred,vgreen,vblue)
-                            new_obj.data.materials.append(newmat)
-                        new_obj.keyframe_insert(data_path="location", frame=cframe)
-                        new_obj.keyframe_insert(data_path="scale", frame=cframe)
-                        nodes.objects.link(new_obj)
-                else:
-                    print("add keyframe "+vname+" "+str(cframe))
-                    old_obj=nodes.objects[vname]
-                    old_obj.location=( float(vx), float(vy), float(vz) )
-                    old_obj.scale=(float(vsz),float(vsz),float(vsz))
-                    old_obj.keyframe_insert(data_path="location", frame=cframe)
-                    old_obj.keyframe_insert(data_path="scale", frame=cframe)
-                    if 'materials' in dir(old_obj.data):
-                        modify_material(vname,vred,vgreen,vblue)
-                
-        
-        print("add edges")
-
-
+        netimp=scene.netimport
+        instanced=netimp.instancebool
+        sharedmat=scene.netimport.sharedmatbool
+        sharedmats={}
+        #new objects are linked together once everything is built
+        newnodes=[]
+        newedges=[]
         if (enames+'edges') not in bpy.data.collections:
             edges = bpy.data.collections.new((enames+'edges'))
-            bpy.context.scene.collection.children.link(edges)
+            scene.collection.children.link(edges)
         else:
             edges=bpy.data.collections[(enames+'edges')]
-        bpy.context.view_layer.active_layer_collection = \
-        bpy.context.view_layer.layer_collection.children[(enames+'edges')]                
-        with open(edatapath) as csvfile:
-            rdr = csv.reader( csvfile )
-            for i, row in enumerate( rdr ):
-                #if i == 0: continue # Skip column titles
-                if i == 0: continue
-            
-                efromname,etoname,esz, ecol,from_x, from_y, from_z, to_x, to_y, to_z, ered,egreen,eblue,ecurve,forcecurve,fromshort,toshort,arrowlength,arrowsize,edge3d,edash,forcedash,ename = [row[i] for i in ecolind] 
-                forcecurve=forcecurve=='TRUE'
-                forcedash=forcedash=='TRUE'
-                if ename not in edges.objects:  
-                    print("adding "+ename+" "+str(i)) 
-                    o = add_bezier([float(from_x),float(from_y),float(from_z)],[float(to_x),float(to_y),float(to_z)],
-                    ename,float(ecurve),forcecurve,toshorten=float(toshort),fromshorten=float(fromshort),arrowlength=float(arrowlength))
-                                
-                    o.name=ename
-                    curve = o.data
-                    curve.name=ename
-                    
-                    
-
-                    newmat=make_material(ename,ered,egreen,eblue,float(edash),forcedash=forcedash)
-                    curve.materials.append(newmat)
-
-                    curve.dimensions = '3D'
-                    curve.bevel_depth = float(esz)
-                    curve.keyframe_insert(data_path="bevel_depth", frame=cframe)
-                    curve.bevel_resolution = 3
-                    if edge3d == 'FALSE':
-                        o.scale.z=0.00001
-                        curve.extrude=1
-                    o.keyframe_insert(data_path="scale", frame=cframe)
-                    edges.objects.link(o)
-                    if float(arrowlength)>0:
-                        o=add_arrowhead([float(from_x),float(from_y),float(from_z)],[float(to_x),float(to_y),float(to_z)],ered,egreen,eblue,ename,float(toshort),float(fromshort),arrowsize=float(arrowsize),arrowlength=float(arrowlength),ecurve=float(ecurve),forcecurve=forcecurve,edge3d=edge3d)
+        index=self.index
+        if index is None or index.nodes!=nodes or index.edges!=edges:
+            index=NetIndex(nodes,edges)
+            self.index=index
+        vrows=table_rows(vtable,["name","x","y","z","shape","size","red","green","blue"])
+        if instanced:
+            add_instanced_nodes(vrows)
+            vrows=[]
+        for i,(vname,vx, vy, vz, vshape, vsz, vred, vgreen, vblue) in enumerate(vrows):
+            if vname not in index.objects["node"]:
+                log.debug("adding "+vname+" "+str(i))
+                if vshape in node_shapes:
+                    #objects share one mesh per shape and carry their own material
+                    new_obj=bpy.data.objects.new(vname,shape_mesh(vshape))
+                    new_obj["net2blend_shape"]=vshape
+                    if netimp.lod!="HIGH":
+                        set_node_mesh(new_obj,vshape,node_lod(netimp,scene,vsz,(vx,vy,vz)),scene.camera)
+                    new_obj.location=( vx, vy, vz )
+                    new_obj.scale=(vsz,vsz,vsz)
+                    newmat=make_material(vname,vred,vgreen,vblue,obj=new_obj)
+                    new_obj.material_slots[0].link='OBJECT'
+                    new_obj.material_slots[0].material=newmat
+                    keys.insert(new_obj,"location",cframe)
+                    keys.insert(new_obj,"scale",cframe)
+                    new_obj["net2blend_id"]=vname
+                    new_obj["net2blend_role"]="node"
+                    index.objects["node"][vname]=new_obj
+                    newnodes.append(new_obj)
                 else:
-                    print("add keyframe "+ename+" "+str(cframe))
-                    #get edge
-                    o = modify_bezier([float(from_x),float(from_y),float(from_z)],[float(to_x),float(to_y),float(to_z)],
-                    ename,float(ecurve),forcecurve=forcecurve,toshorten=float(toshort),fromshorten=float(fromshort),arrowlength=float(arrowlength))
-                    curve = o.data
-                    curve.name=ename
-                    curve.dimensions = '3D'
-                    curve.bevel_depth = float(esz)
-                    curve.keyframe_insert(data_path="bevel_depth", frame=cframe)
-                    curve.bevel_resolution = 3
-                    if edge3d == 'FALSE':
-                        o.scale.z=0.00001
-                    o.keyframe_insert(data_path="scale", frame=cframe)
-                    modify_material(ename,ered,egreen,eblue,float(edash),forcedash)
-                    if float(arrowlength)>0:
-                        move_arrowhead([float(from_x),float(from_y),float(from_z)],[float(to_x),float(to_y),float(to_z)],ered,egreen,eblue,ename,float(toshort),float(fromshort),arrowsize=float(arrowsize),arrowlength=float(arrowlength),ecurve=float(ecurve),forcecurve=forcecurve,edge3d=edge3d)
-                    
-                    
-                    
-
+                    if vshape not in bpy.data.objects: 
+                        if vshape != "none":
+                            log.warning("object not found: "+vshape)
+                        continue
+
+                    template=bpy.data.objects[vshape]
+                    new_obj = template.copy()
+                    if netimp.linkbool:
+                        #one copy of the template's data for every node, coloured from Object.color
+                        data=index.linked.get(vshape)
+                        if data is None:
+                            data=template.data
+                            if 'materials' in dir(data) and not data.materials:
+                                data=data.copy()
+                                data.name="net2blend_linked_"+vshape
+                                data.materials.append(shared_material(False))
+                            index.linked[vshape]=data
+                        new_obj.data=data
+                        new_obj.name=vname
+                        new_obj["net2blend_linked"]=vshape
+                        if data!=template.data:
+                            new_obj["net2blend_shared"]=True
+                            colour_object(new_obj,vred,vgreen,vblue)
+                    else:
+                        new_obj.data = template.data.copy()
+                        new_obj.name=vname
+                        new_obj.data.name=vname
+                    new_obj.location=( vx, vy, vz )
+                    new_obj.scale=(vsz,vsz,vsz)
+                    if 'materials' in dir(new_obj.data) and not new_obj.data.materials:
+                        newmat=make_material(vname,vred,vgreen,vblue,obj=new_obj)
+                        new_obj.data.materials.append(newmat)
+                    keys.insert(new_obj,"location",cframe)
+                    keys.insert(new_obj,"scale",cframe)
+                    new_obj["net2blend_id"]=vname
+                    new_obj["net2blend_role"]="node"
+                    index.objects["node"][vname]=new_obj
+                    newnodes.append(new_obj)
+            else:
+                log.debug("add keyframe "+vname+" "+str(cframe))
+                old_obj=index.objects["node"][vname]
+                old_obj.location=( vx, vy, vz )
+                old_obj.scale=(vsz,vsz,vsz)
+                keys.insert(old_obj,"location",cframe)
+                keys.insert(old_obj,"scale",cframe)
+                if 'materials' in dir(old_obj.data):
+                    modify_material(vname,vred,vgreen,vblue,obj=old_obj)
+        with profile.phase("linking"):
+            for new_obj in newnodes:
+                nodes.objects.link(new_obj)
+
+        log.info("add edges")
+
+        erows=table_rows(etable,["size","red","green","blue","arrowlength","arrowsize","is3d","dash","isdashed","name"])
+        geometry=self.geometry
+        if geometry is None:
+            with profile.phase("geometry"):
+                geometry=edge_geometry(etable)
+        grows=table_rows(geometry,["start","control","end","mid","curved","arrow"])
+        mergeedges=scene.netimport.mergebool
+        splineids={}
+        slotids={}
+        for i,((esz,ered,egreen,eblue,arrowlength,arrowsize,edge3d,edash,forcedash,ename),(start,control,end,mid,curved,rotation)) in enumerate(zip(erows,grows)):
+            if mergeedges and ename not in index.objects["edge"]:
+                merged_edge(ename,start,control,end,mid,curved,esz,ered,egreen,eblue,edash,forcedash,edge3d)
+                if arrowlength>0:
+                    if ename not in index.objects["arrowhead"]:
+                        add_arrowhead(end,rotation,ered,egreen,eblue,ename,arrowsize=arrowsize,arrowlength=arrowlength,edge3d=edge3d)
+                    else:
+                        move_arrowhead(end,rotation,ered,egreen,eblue,ename,arrowsize=arrowsize,arrowlength=arrowlength,edge3d=edge3d)
+            elif ename not in index.objects["edge"]:
+                log.debug("adding "+ename+" "+str(i))
+                o = add_bezier(start,control,end,mid,curved,ename)
+                            
+                o.name=ename
+                curve = o.data
+                curve.name=ename
+                
+                
+                
+                newmat=make_material(ename,ered,egreen,eblue,edash,forcedash=forcedash,role="edge",obj=o)
+                curve.materials.append(newmat)
+
+                curve.dimensions = '3D'
+                curve.bevel_depth = esz
+                keys.insert(curve,"bevel_depth",cframe)
+                curve.bevel_resolution = 3
+                if not edge3d:
+                    o.scale.z=0.00001
+                    curve.extrude=1
+                keys.insert(o,"scale",cframe)
+                o["net2blend_id"]=ename
+                o["net2blend_role"]="edge"
+                index.objects["edge"][ename]=o
+                newedges.append(o)
+                if arrowlength>0:
+                    o=add_arrowhead(end,rotation,ered,egreen,eblue,ename,arrowsize=arrowsize,arrowlength=arrowlength,edge3d=edge3d)
+            else:
+                log.debug("add keyframe "+ename+" "+str(cframe))
+                #get edge
+                o = modify_bezier(start,control,end,mid,curved,ename)
+                curve = o.data
+                curve.name=ename
+                curve.dimensions = '3D'
+                curve.bevel_depth = esz
+                keys.insert(curve,"bevel_depth",cframe)
+                curve.bevel_resolution = 3
+                if not edge3d:
+                    o.scale.z=0.00001
+                keys.insert(o,"scale",cframe)
+                modify_material(ename,ered,egreen,eblue,edash,forcedash,role="edge",obj=o)
+                if arrowlength>0:
+                    move_arrowhead(end,rotation,ered,egreen,eblue,ename,arrowsize=arrowsize,arrowlength=arrowlength,edge3d=edge3d)
+        for key,ids in splineids.items():
+            index.objects["merged"][key]["net2blend_names"]=sorted(ids,key=ids.get)
+        profile.pop()
+        with profile.phase("linking"):
+            for new_obj in newedges:
+                edges.objects.link(new_obj)
+        if self.keys is None:
+            keys.flush()
+            #single depsgraph update for everything added above
+            with profile.phase("linking"):
+                context.view_layer.update()
+
+
+def network_name(name):
+    #network id a datablock was named after, e.g. "a_b.001", "a_b_ah_mat" or "a_b_matAction" -> "a_b"
+    name=re.sub(r"\.\d{3,}$","",name)
+    for suffix in ("Action","_mat","_ah"):
+        if name.endswith(suffix):
+            name=name[:-len(suffix)]
+    return name
+
+def purge_network_orphans(names):
+    #remove unused datablocks left by earlier imports of a network with these node and edge names
+    removed=0
+    for datablocks in (bpy.data.meshes,bpy.data.curves,bpy.data.materials,bpy.data.node_groups,bpy.data.actions):
+        for item in list(datablocks):
+            if item.users>0 or item.use_fake_user:
+                continue
+            if (item.name.startswith("net2blend_") or item.get("net2blend_id") in names
+                    or network_name(item.name) in names):
+                datablocks.remove(item)
+                removed+=1
+    return removed
+
+def import_timesteps(context,steps,large=False,tables=None):
+    #import (frame, edata path, vdata path) steps as one animation, returns the keyframe writer and profile,
+    #tables are the steps' read_timestep results when they are already read
+    netimp=context.scene.netimport
+    profile=ImportProfile()
+    counts=(len(bpy.data.objects),len(bpy.data.materials))
+    #folders of .npy columns are memory-mapped, so are never streamed
+    stream=(netimp.streambool and tables is None
+        and not any(os.path.isdir(p) for cframe,edatapath,vdatapath in steps for p in (edatapath,vdatapath)))
+    if stream:
+        #each timestep is read in chunks while it is built
+        tables=[None]*len(steps)
+    elif tables is None:
+        #every timestep is parsed before the scene is touched
+        log.info("reading "+str(len(steps))+" networks")
+        with profile.phase("parse"):
+            tables=read_timesteps(steps,netimp.workers,bpy.path.abspath(netimp.cachepath))
+    if large:
+        names=set()
+        if stream:
+            with profile.phase("parse"):
+                for cframe,edatapath,vdatapath in steps:
+                    for vtable in table_chunks(vdatapath,[("name",str)],netimp.chunkrows):
+                        names.update(vtable["name"])
+                    for etable in table_chunks(edatapath,[("name",str)],netimp.chunkrows):
+                        names.update(etable["name"])
+        else:
+            for vtable,etable,geometry in tables:
+                names.update(vtable["name"])
+                names.update(etable["name"])
+        with profile.phase("purge"):
+            profile.count("orphans removed",purge_network_orphans(names))
+    #objects are built once and keyed at each frame without changing the current frame,
+    #then every F-Curve is written on flush
+    keys=scene_keyframe_writer(netimp)
+    missing=MissingKeys(netimp.missingmode)
+    index=None
+    for file,((cframe,edatapath,vdatapath),table) in enumerate(zip(steps,tables)):
+        log.info("importing network "+str(file))
+        if stream:
+            chunks=profile.timed_iter("parse",stream_timestep(vdatapath,edatapath,netimp.chunkrows))
+        else:
+            chunks=[table]
+        vertices=set()
+        edges=set()
+        for vtable,etable,geometry in chunks:
+            netimporter1=importnet(context,edatapath,vdatapath,cframe,keys=keys,vtable=vtable,etable=etable,index=index,geometry=geometry,profile=profile)
+            netimporter1.do_import()
+            index=netimporter1.index
+            vertices.update(vtable["name"])
+            edges.update(etable["name"])
+            if stream and len(steps)==1:
+                #a single network's keys are written chunk by chunk too
+                ProfiledKeys(keys,profile).flush()
+        with profile.phase("objects"):
+            missing.step(index,vertices,edges,ProfiledKeys(keys,profile),cframe)
+    ProfiledKeys(keys,profile).flush()
+    with profile.phase("linking"):
+        context.view_layer.update()
+    finish_profile(profile,netimp,keys,counts)
+    prune_cache(bpy.path.abspath(netimp.cachepath),netimp.cachesize)
+    return keys,profile
+
+
+#networks shown by the preview, drawn without adding anything to the file
+preview={}
+
+def flat_colour_shader():
+    #builtin shaders lost their 3D_ prefix in Blender 4.0
+    try:
+        return gpu.shader.from_builtin('FLAT_COLOR')
+    except ValueError:
+        return gpu.shader.from_builtin('3D_FLAT_COLOR')
+
+def preview_lines(vtable,etable,geometry):
+    #line vertices and colours of one timestep: a cross the size of each node,
+    #and each edge as one segment, or two through its control point when curved
+    pos=np.stack([vtable["x"],vtable["y"],vtable["z"]],axis=1).reshape(-1,3)
+    size=np.asarray(vtable["size"])
+    offsets=np.concatenate([np.eye(3),-np.eye(3)])[[0,3,1,4,2,5]]
+    nodes=(pos[:,None,:]+offsets[None,:,:]*size[:,None,None]).reshape(-1,3)
+    ncol=np.stack([vtable["red"],vtable["green"],vtable["blue"],np.ones(len(size))],axis=1).reshape(-1,4)
+    ncol=np.repeat(ncol,6,axis=0)
+    curved=np.asarray(geometry["curved"],dtype=bool)
+    start,control,end=geometry["start"],geometry["control"],geometry["end"]
+    first=np.where(curved[:,None],control,end)
+    edges=np.concatenate([np.stack([start,first],axis=1).reshape(-1,3),
+        np.stack([control[curved],end[curved]],axis=1).reshape(-1,3)])
+    ecol=np.stack([etable["red"],etable["green"],etable["blue"],np.ones(len(curved))],axis=1).reshape(-1,4)
+    ecol=np.concatenate([np.repeat(ecol,2,axis=0),np.repeat(ecol[curved],2,axis=0)])
+    return np.concatenate([nodes,edges]).astype(np.float32),np.concatenate([ncol,ecol]).astype(np.float32)
+
+def preview_step(frame):
+    #timestep shown at a frame, the last one at or before it
+    k=bisect.bisect_right(preview["frames"],frame)-1
+    return max(k,0)
+
+def draw_preview():
+    if not preview.get("tables"):
+        return
+    k=preview_step(bpy.context.scene.frame_current)
+    batch=preview["batches"].get(k)
+    if batch is None:
+        #built when first shown, only timesteps that are looked at cost anything
+        pos,col=preview_lines(*preview["tables"][k])
+        batch=batch_for_shader(preview["shader"],'LINES',{"pos":pos,"color":col})
+        preview["batches"][k]=batch
+    gpu.state.depth_test_set('LESS_EQUAL')
+    gpu.state.line_width_set(2)
+    preview["shader"].bind()
+    batch.draw(preview["shader"])
+    gpu.state.line_width_set(1)
+    gpu.state.depth_test_set('NONE')
+
+@persistent
+def preview_frame_change(scene,depsgraph=None):
+    #the draw handler picks the timestep, the viewports just need redrawing
+    if not preview.get("tables") or bpy.context.screen is None:
+        return
+    for area in bpy.context.screen.areas:
+        if area.type=='VIEW_3D':
+            area.tag_redraw()
+
+def clear_preview():
+    if "handle" in preview:
+        bpy.types.SpaceView3D.draw_handler_remove(preview["handle"],'WINDOW')
+    preview.clear()
 
 # ------------------------------------------------------------------------
 #    Operators
 # ------------------------------------------------------------------------
 
+def report_import(op,netimp,keys,profile):
+    if netimp.changedbool:
+        op.report({'INFO'},"Skipped "+str(keys.suppressed)+" unchanged keys")
+    if "orphans removed" in profile.counts:
+        op.report({'INFO'},"Removed "+str(profile.counts["orphans removed"])+" unused datablocks of earlier imports")
+
 class FolderImport(bpy.types.Operator):
     """Import network to blender"""      # Use this as a tooltip for menu items and buttons.
     bl_idname = "object.networkfolder"        # Unique identifier for buttons and menu items to reference.
     bl_label = "Import folder of networks"         # Display name in the interface.
     bl_options = {'REGISTER', 'UNDO'}  # Enable undo for the operator.  
+    large = False
 
     def execute(self, context):        # execute() is called when running the operator.
-        print("import multiple networks")
+        log.setLevel(context.scene.netimport.loglevel)
+        log.info("import multiple networks")
         scene = context.scene
         netimp = scene.netimport
-        folderpath=netimp.folderpath
-        frameint=netimp.frameint
-        sortbool=netimp.orderbool
-        framebool=netimp.framebool		
-        files=os.listdir(folderpath)
-        fullfiles=[folderpath+"\\"+f for f in files]
-        if sortbool:
-            filenames=[f.split("_")[-2] for f in files]
-
-            fullfiles=[x for _, x in sorted(zip(filenames, fullfiles))]
-            print(fullfiles)
-        else:
-            fullfiles.sort(key=os.path.getmtime)
-        edatafiles = [f for f in fullfiles if "edata" in f]
-        vdatafiles = [f for f in fullfiles if "vdata" in f]
-        for file in range(0,len(edatafiles)):
-            print("importing network "+str(file))
-            edatapath=edatafiles[file]
-            vdatapath=vdatafiles[file]
-            if framebool:
-                 cframe=int(edatapath.split("_")[-2])
-            else:
-                 cframe=file*frameint
-            bpy.context.scene.frame_set(cframe) 
-            print(edatapath+" "+vdatapath+" "+str(cframe))
-            netimporter1=importnet(context,edatapath,vdatapath,cframe)
-            netimporter1.do_import()
+        steps=folder_timesteps(netimp.folderpath,netimp.orderbool,netimp.framebool,netimp.frameint)
+        try:
+            keys,profile=import_timesteps(context,steps,large=self.large)
+        except NetImportError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        report_import(self,netimp,keys,profile)
             
-        print("DONE")
+        log.info("DONE")
         return {'FINISHED'}            # Lets Blender know the operator finished successfully.    
     
 class NetImport(bpy.types.Operator):
@@ -721,25 +2297,256 @@ class NetImport(bpy.types.Operator):
     bl_idname = "object.network"        # Unique identifier for buttons and menu items to reference.
     bl_label = "Import network"         # Display name in the interface.
     bl_options = {'REGISTER', 'UNDO'}  # Enable undo for the operator.       
+    large = False
 
 
             
     def execute(self, context):        # execute() is called when running the operator.
-        print("import single network")
+        log.setLevel(context.scene.netimport.loglevel)
+        log.info("import single network")
         scene = context.scene
         netimp = scene.netimport
-        edatapath=netimp.edatapath
-        vdatapath=netimp.vdatapath
-        cframe=netimp.cframe
-        bpy.context.scene.frame_set(cframe)
-        netimporter1=importnet(context,edatapath,vdatapath,cframe)
-        netimporter1.do_import()
+        try:
+            steps,tables=single_timesteps(netimp)
+        except NetImportError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        if not steps:
+            self.report({'WARNING'},"No networks found")
+            return {'CANCELLED'}
+        cframe=steps[0][0]
+        if self.large:
+            #the frame is evaluated once, after the import
+            scene.frame_current=cframe
+        else:
+            bpy.context.scene.frame_set(cframe)
+        try:
+            keys,profile=import_timesteps(context,steps,large=self.large,tables=tables)
+        except NetImportError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        report_import(self,netimp,keys,profile)
               
-        print("DONE")
+        log.info("DONE")
         return {'FINISHED'}            # Lets Blender know the operator finished successfully.
 
 
 
+class LargeFolderImport(FolderImport):
+    """Import network to blender without an undo step, removing what earlier imports left unused"""
+    bl_idname = "object.networkfolderlarge"
+    bl_label = "Import folder of networks"
+    #no undo snapshot of the whole file
+    bl_options = {'REGISTER'}
+    large = True
+
+class LargeNetImport(NetImport):
+    """Import network to blender without an undo step, removing what earlier imports left unused"""
+    bl_idname = "object.networklarge"
+    bl_label = "Import network"
+    bl_options = {'REGISTER'}
+    large = True
+
+class ModalImport(bpy.types.Operator):
+    """Import network to blender a batch of rows at a time, Esc to stop"""
+    bl_idname = "object.networkmodal"
+    bl_label = "Import in batches"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    folder: BoolProperty(
+        name="Folder",
+        description="Import the folder of networks instead of a single network",
+        default=False
+        )
+
+    def invoke(self, context, event):
+        scene = context.scene
+        netimp = scene.netimport
+        log.setLevel(netimp.loglevel)
+        log.info("import networks in batches")
+        tables=None
+        if self.folder:
+            self.steps=folder_timesteps(netimp.folderpath,netimp.orderbool,netimp.framebool,netimp.frameint)
+        else:
+            try:
+                self.steps,tables=single_timesteps(netimp)
+            except NetImportError as err:
+                self.report({'ERROR'},str(err))
+                return {'CANCELLED'}
+            if self.steps:
+                scene.frame_set(self.steps[0][0])
+        if not self.steps:
+            self.report({'WARNING'},"No networks found")
+            return {'CANCELLED'}
+        try:
+            self.keys=scene_keyframe_writer(netimp)
+        except NetImportError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        self.profile=ImportProfile()
+        self.counts=(len(bpy.data.objects),len(bpy.data.materials))
+        self.missing=MissingKeys(netimp.missingmode)
+        self.reader=TimestepReader(self.steps,netimp.workers,bpy.path.abspath(netimp.cachepath),tables)
+        self.index=None
+        #current timestep, its tables and the next row to import from them
+        self.step=0
+        self.tables=None
+        self.row=0
+        self.rows=0
+        self.started=time.perf_counter()
+        context.window_manager.progress_begin(0,len(self.steps))
+        self.timer=context.window_manager.event_timer_add(0.01,window=context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type=='ESC':
+            self.finish(context)
+            self.report({'WARNING'},"Import stopped at network "+str(self.step)+" of "+str(len(self.steps)))
+            return {'FINISHED'}
+        if event.type!='TIMER':
+            return {'PASS_THROUGH'}
+        netimp=context.scene.netimport
+        budget=netimp.batchsize
+        try:
+            while budget>0 and self.step<len(self.steps):
+                if self.tables is None:
+                    if not self.reader.ready(self.step):
+                        break
+                    with self.profile.phase("parse"):
+                        self.tables=self.reader.result(self.step)
+                vtable,etable,geometry=self.tables
+                size=max(len(vtable["name"]),len(etable["name"]))
+                stop=min(size,self.row+budget)
+                cframe,edatapath,vdatapath=self.steps[self.step]
+                netimporter1=importnet(context,edatapath,vdatapath,cframe,keys=self.keys,
+                    vtable=table_slice(vtable,self.row,stop),etable=table_slice(etable,self.row,stop),
+                    index=self.index,geometry=table_slice(geometry,self.row,stop),profile=self.profile)
+                netimporter1.do_import()
+                self.index=netimporter1.index
+                budget-=max(1,stop-self.row)
+                self.rows+=stop-self.row
+                self.row=stop
+                if self.row>=size:
+                    with self.profile.phase("objects"):
+                        self.missing.step(self.index,set(vtable["name"]),set(etable["name"]),
+                            ProfiledKeys(self.keys,self.profile),cframe)
+                    self.step+=1
+                    self.tables=None
+                    self.row=0
+        except NetImportError as err:
+            self.finish(context)
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        if self.step>=len(self.steps):
+            self.finish(context)
+            log.info("DONE")
+            return {'FINISHED'}
+        self.show_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def show_progress(self, context):
+        done=self.step
+        if self.tables is not None:
+            size=max(len(self.tables[0]["name"]),len(self.tables[1]["name"]),1)
+            done+=self.row/size
+        elapsed=time.perf_counter()-self.started
+        rate=self.rows/elapsed if elapsed>0 else 0
+        eta=elapsed*(len(self.steps)-done)/done if done>0 else 0
+        context.window_manager.progress_update(done)
+        context.scene.netimport.progress="%d/%d networks, %.0f rows/s, %.0fs left (Esc to stop)"%(self.step,len(self.steps),rate,eta)
+        for area in context.screen.areas:
+            if area.type=='VIEW_3D':
+                area.tag_redraw()
+
+    def finish(self, context):
+        #everything imported so far is keyed and linked, so the scene is left consistent
+        netimp=context.scene.netimport
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.progress_end()
+        self.reader.close()
+        ProfiledKeys(self.keys,self.profile).flush()
+        with self.profile.phase("linking"):
+            context.view_layer.update()
+        if netimp.changedbool:
+            self.report({'INFO'},"Skipped "+str(self.keys.suppressed)+" unchanged keys")
+        finish_profile(self.profile,netimp,self.keys,self.counts)
+        prune_cache(bpy.path.abspath(netimp.cachepath),netimp.cachesize)
+        netimp.progress=""
+        for area in context.screen.areas:
+            if area.type=='VIEW_3D':
+                area.tag_redraw()
+
+class PreviewNetwork(bpy.types.Operator):
+    """Draw the network in the viewport without importing it"""
+    bl_idname = "object.networkpreview"
+    bl_label = "Preview"
+
+    folder: BoolProperty(
+        name="Folder",
+        description="Preview the folder of networks instead of a single network",
+        default=False
+        )
+
+    def execute(self, context):
+        netimp = context.scene.netimport
+        if np is None:
+            self.report({'ERROR'},"The preview needs numpy")
+            return {'CANCELLED'}
+        try:
+            if self.folder:
+                steps=folder_timesteps(netimp.folderpath,netimp.orderbool,netimp.framebool,netimp.frameint)
+                tables=read_timesteps(steps,netimp.workers,bpy.path.abspath(netimp.cachepath))
+            else:
+                steps,tables=single_timesteps(netimp)
+                if tables is None:
+                    tables=read_timesteps(steps,netimp.workers,bpy.path.abspath(netimp.cachepath))
+        except NetImportError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        clear_preview()
+        order=sorted(range(len(steps)),key=lambda k:steps[k][0])
+        preview["folder"]=self.folder
+        preview["frames"]=[steps[k][0] for k in order]
+        preview["tables"]=[tables[k] for k in order]
+        preview["batches"]={}
+        preview["shader"]=flat_colour_shader()
+        preview["handle"]=bpy.types.SpaceView3D.draw_handler_add(draw_preview,(),'WINDOW','POST_VIEW')
+        preview_frame_change(context.scene)
+        return {'FINISHED'}
+
+class PreviewClear(bpy.types.Operator):
+    """Stop drawing the network preview"""
+    bl_idname = "object.networkpreviewclear"
+    bl_label = "Clear preview"
+
+    def execute(self, context):
+        clear_preview()
+        for area in context.screen.areas:
+            if area.type=='VIEW_3D':
+                area.tag_redraw()
+        return {'FINISHED'}
+
+class PreviewImport(bpy.types.Operator):
+    """Import the previewed network"""
+    bl_idname = "object.networkpreviewimport"
+    bl_label = "Import previewed network"
+    #the import it runs pushes the undo step
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        folder=preview.get("folder",False)
+        large=context.scene.netimport.largebool
+        clear_preview()
+        if folder:
+            if large:
+                return bpy.ops.object.networkfolderlarge()
+            return bpy.ops.object.networkfolder()
+        if large:
+            return bpy.ops.object.networklarge()
+        return bpy.ops.object.network()
+
+
 # ------------------------------------------------------------------------
 #    Panel in Object Mode
 # ------------------------------------------------------------------------
@@ -760,6 +2567,8 @@ class NetImportPanel(Panel):
         scene = context.scene
         netimp = scene.netimport
         
+        if netimp.progress:
+            layout.label(text=netimp.progress)
         box1 = layout.box()
         box1.label(text="Import single network")
         box1.label(text="Edge data path:")
@@ -767,8 +2576,17 @@ class NetImportPanel(Panel):
         box1.label(text="Vertex data path:")
         box1.prop(netimp, "vdatapath")
         box1.prop(netimp, "cframe")
+        row20 = box1.row(align=True)
+        row20.label(text="Timestep column:")
+        row20.prop(netimp, "timecolumn")
+        if netimp.timecolumn:
+            row21 = box1.row(align=True)
+            row21.label(text="Column holds frames:")
+            row21.prop(netimp, "timeframebool")
+            box1.prop(netimp, "frameint")
         box1.separator()
-        box1.operator( "object.network")
+        box1.operator( "object.networklarge" if netimp.largebool else "object.network")
+        box1.operator( "object.networkmodal").folder=False
         box1.separator()
         
         box2 = layout.box()
@@ -785,8 +2603,320 @@ class NetImportPanel(Panel):
         row1.prop(netimp, "orderbool")
         row2 = col1.row(align=True)
         row2.label(text="Frame number from suffix:")
-        row2.prop(netimp, "framebool")   		
-        box2.operator( "object.networkfolder")
+        row2.prop(netimp, "framebool")
+        row7 = col1.row(align=True)
+        row7.label(text="Reader processes:")
+        row7.prop(netimp, "workers")
+        box2.operator( "object.networkfolderlarge" if netimp.largebool else "object.networkfolder")
+        box2.operator( "object.networkmodal").folder=True
+
+        box4 = layout.box()
+        box4.label(text="Preview without importing")
+        if preview.get("tables"):
+            box4.label(text=str(len(preview["tables"]))+" networks shown")
+            box4.operator( "object.networkpreviewimport")
+            box4.operator( "object.networkpreviewclear")
+        else:
+            row14 = box4.row(align=True)
+            row14.operator( "object.networkpreview", text="Single network").folder=False
+            row14.operator( "object.networkpreview", text="Folder").folder=True
+
+        box3 = layout.box()
+        box3.label(text="Import options")
+        col2 = box3.column(align=True)
+        row3 = col2.row(align=True)
+        row3.label(text="Instance nodes:")
+        row3.prop(netimp, "instancebool")
+        row6 = col2.row(align=True)
+        row6.label(text="Merge edges:")
+        row6.prop(netimp, "mergebool")
+        row5 = col2.row(align=True)
+        row5.label(text="Shared materials:")
+        row5.prop(netimp, "sharedmatbool")
+        row19 = col2.row(align=True)
+        row19.label(text="Link custom shapes:")
+        row19.prop(netimp, "linkbool")
+        row4 = col2.row(align=True)
+        row4.label(text="Keyframes:")
+        row4.prop(netimp, "keymode")
+        if netimp.keymode=='LIVE':
+            row18 = col2.row(align=True)
+            row18.label(text="Live sidecars:")
+            row18.prop(netimp, "livepath")
+        row8 = col2.row(align=True)
+        row8.label(text="Only key changes:")
+        row8.prop(netimp, "changedbool")
+        row8.prop(netimp, "keytolerance")
+        row9 = col2.row(align=True)
+        row9.label(text="Console output:")
+        row9.prop(netimp, "loglevel")
+        row10 = col2.row(align=True)
+        row10.label(text="Batch size:")
+        row10.prop(netimp, "batchsize")
+        row11 = col2.row(align=True)
+        row11.label(text="Node detail:")
+        row11.prop(netimp, "lod")
+        if netimp.lod in ('SIZE','DISTANCE'):
+            row12 = col2.row(align=True)
+            row12.prop(netimp, "lodsize")
+            row12.prop(netimp, "loddistance")
+        row13 = col2.row(align=True)
+        row13.label(text="High detail renders:")
+        row13.prop(netimp, "lodrender")
+        row15 = col2.row(align=True)
+        row15.label(text="Large import (no undo):")
+        row15.prop(netimp, "largebool")
+        row16 = col2.row(align=True)
+        row16.label(text="Stream csvs:")
+        row16.prop(netimp, "streambool")
+        row16.prop(netimp, "chunkrows")
+        row17 = col2.row(align=True)
+        row17.label(text="Missing nodes/edges:")
+        row17.prop(netimp, "missingmode")
+        col2.label(text="Import profile JSON:")
+        col2.prop(netimp, "profilepath")
+        col2.label(text="Parsed csv cache:")
+        col2.prop(netimp, "cachepath")
+        col2.prop(netimp, "cachesize")
+
+# ------------------------------------------------------------------------
+#    Command line
+# ------------------------------------------------------------------------
+
+def shard_steps(steps,shards,shard):
+    #steps of one part of the timeline with the frame range it covers,
+    #each part also keys the first step of the next so its animation runs to the end of the range
+    per=-(-len(steps)//shards)
+    start=shard*per
+    stop=min(len(steps),start+per)
+    if start>=stop:
+        return [],None,None
+    frame_end=steps[stop][0]-1 if stop<len(steps) else steps[-1][0]
+    return steps[start:stop+1],steps[start][0],frame_end
+
+def shard_path(out,shard):
+    root,ext=os.path.splitext(out)
+    return root+"_shard%02d"%shard+(ext or ".blend")
+
+def merge_animation(keys,dst,src):
+    #queue the F-Curves of src to be merged into dst on flush
+    if src.animation_data is None or src.animation_data.action is None:
+        return
+    for fc in src.animation_data.action.fcurves:
+        co=[0.0]*(2*len(fc.keyframe_points))
+        fc.keyframe_points.foreach_get("co",co)
+        discrete=len(fc.keyframe_points)>0 and fc.keyframe_points[0].interpolation=='CONSTANT'
+        keys.add_points(dst,fc.data_path,fc.array_index,dict(zip(co[0::2],co[1::2])),discrete)
+
+def animated_pairs(dst,src):
+    #ids of a matching pair of objects that can carry animation
+    pairs=[(dst,src)]
+    if dst.data is not None and src.data is not None and type(dst.data)==type(src.data):
+        pairs.append((dst.data,src.data))
+    for dslot,sslot in zip(dst.material_slots,src.material_slots):
+        dmat,smat=dslot.material,sslot.material
+        if dmat is None or smat is None or dmat==smat:
+            continue
+        pairs.append((dmat,smat))
+        if dmat.node_tree is not None and smat.node_tree is not None:
+            pairs.append((dmat.node_tree,smat.node_tree))
+    return pairs
+
+def shared_datablock(collection,item):
+    #the first file's copy of a datablock shared by name, e.g. net2blend_sphere
+    if item is None or not item.name.startswith("net2blend_"):
+        return item
+    return collection.get(item.name.rsplit(".",1)[0],item)
+
+def merge_shards(context,paths):
+    #append the networks of later shard files to the open one, merging their animation
+    keys=BulkKeyframeWriter()
+    for path in paths:
+        with bpy.data.libraries.load(path) as (src,dst):
+            names=list(src.collections)
+            dst.collections=names
+        base={}
+        for collection in bpy.data.collections:
+            if collection.library is None and collection.name in names:
+                for ob in collection.objects:
+                    if ob.get("net2blend_role") in ("merged","points"):
+                        raise NetImportError("merged edges and instanced nodes can not be merged across shards, keep the shard files instead")
+                    base[(ob.get("net2blend_role"),ob.get("net2blend_id"))]=ob
+        removed=[]
+        for name,collection in zip(names,dst.collections):
+            if not any("net2blend_role" in ob for ob in collection.all_objects):
+                #collections of the template or startup file, e.g. its camera and lights, are already here
+                for ob in collection.objects:
+                    if ob not in removed:
+                        removed.append(ob)
+                removed.append(collection)
+                continue
+            target=bpy.data.collections.get(name)
+            if target is None or target==collection:
+                #only in this shard
+                context.scene.collection.children.link(collection)
+                continue
+            for ob in list(collection.objects):
+                match=base.get((ob.get("net2blend_role"),ob.get("net2blend_id")))
+                if match is None or ob.get("net2blend_id") is None:
+                    #first appears in this shard
+                    target.objects.link(ob)
+                    if isinstance(ob.data,bpy.types.Mesh):
+                        ob.data=shared_datablock(bpy.data.meshes,ob.data)
+                    for slot in ob.material_slots:
+                        slot.material=shared_datablock(bpy.data.materials,slot.material)
+                    continue
+                for dst_id,src_id in animated_pairs(match,ob):
+                    merge_animation(keys,dst_id,src_id)
+                removed.append(ob)
+            removed.append(collection)
+        keys.flush()
+        for item in removed:
+            if isinstance(item,bpy.types.Collection):
+                bpy.data.collections.remove(item)
+            else:
+                bpy.data.objects.remove(item)
+        remove_orphans()
+
+def remove_orphans():
+    #datablocks left unused by the merge
+    for datablocks in (bpy.data.meshes,bpy.data.curves,bpy.data.materials,bpy.data.node_groups,bpy.data.actions):
+        for item in list(datablocks):
+            if item.users==0:
+                datablocks.remove(item)
+
+def cli_args(argv):
+    parser=argparse.ArgumentParser(prog="blender -b [file.blend] -P import_network.py --",
+        description="Import a folder of networks without the interface and save the result")
+    parser.add_argument("--folder",required=True,help="folder of vdata/edata csvs")
+    parser.add_argument("--out",required=True,help=".blend file to save")
+    parser.add_argument("--frameint",type=int,default=24,help="frames between networks")
+    parser.add_argument("--order",action="store_true",help="order networks by suffix")
+    parser.add_argument("--frame-from-suffix",action="store_true",help="frame number from suffix")
+    parser.add_argument("--instance",action="store_true",help="instance nodes")
+    parser.add_argument("--merge-edges",action="store_true",help="write edges as splines of one curve")
+    parser.add_argument("--shared",action="store_true",help="shared materials")
+    parser.add_argument("--link",action="store_true",help="nodes with a custom object shape share its data")
+    parser.add_argument("--missing",choices=["HIDE","SCALE","KEEP"],default="HIDE",
+        help="what happens to nodes and edges missing from a timestep")
+    parser.add_argument("--lod",choices=["HIGH","MEDIUM","LOW","ICO","BILLBOARD","SIZE","DISTANCE"],default="HIGH",
+        help="detail of sphere and circle node meshes")
+    parser.add_argument("--lod-size",type=float,default=0.5,help="smallest node size drawn in high detail by SIZE/DISTANCE")
+    parser.add_argument("--lod-distance",type=float,default=20,help="camera distance of that size in high detail for DISTANCE")
+    parser.add_argument("--lod-render",action="store_true",help="render nodes in high detail")
+    parser.add_argument("--keymode",choices=["BULK","INSERT","LIVE"],default="BULK",
+        help="LIVE saves sidecar arrays instead of keyframes, not with --shards")
+    parser.add_argument("--live-path",default="",help="folder for the live animation sidecars")
+    parser.add_argument("--changed",action="store_true",help="only key values that change")
+    parser.add_argument("--tolerance",type=float,default=0.0001)
+    parser.add_argument("--workers",type=int,default=None,help="processes reading csvs, one per core by default")
+    parser.add_argument("--cache",default="",help="folder for the parsed csv cache")
+    parser.add_argument("--cache-size",type=int,default=1024,help="largest size of the csv cache in MB")
+    parser.add_argument("--stream",action="store_true",help="read and build csvs a chunk of rows at a time")
+    parser.add_argument("--chunk-rows",type=int,default=50000,help="rows read at a time when streaming")
+    parser.add_argument("--large",action="store_true",help="first remove unused data left by earlier imports of the network")
+    parser.add_argument("--log",choices=["WARNING","INFO","DEBUG"],default="INFO")
+    parser.add_argument("--profile",default="",help="JSON file for the import profile")
+    parser.add_argument("--shards",type=int,default=1,help="split the timeline into this many frame ranges")
+    parser.add_argument("--shard",type=int,default=None,help="import only this frame range")
+    parser.add_argument("--jobs",type=int,default=1,help="Blender processes importing shards at once")
+    parser.add_argument("--merge",action="store_true",help="merge the shard files into --out")
+    return parser.parse_args(argv)
+
+def run_shards(argv,args):
+    #one background Blender per shard, jobs at a time
+    workers=args.workers
+    if workers is None:
+        workers=max(1,(os.cpu_count() or 1)//args.jobs)
+    commands=[[bpy.app.binary_path,"-b",bpy.data.filepath,"--python-exit-code","1","-P",os.path.abspath(__file__),"--"]
+        +argv+["--shard",str(k),"--workers",str(workers)] for k in range(args.shards)]
+    if not bpy.data.filepath:
+        commands=[c[:2]+c[3:] for c in commands]
+    running=[]
+    failed=0
+    while commands or running:
+        while commands and len(running)<args.jobs:
+            running.append(subprocess.Popen(commands.pop(0)))
+        proc=running.pop(0)
+        if proc.wait()!=0:
+            failed+=1
+    return failed
+
+def run_cli(argv):
+    args=cli_args(argv)
+    context=bpy.context
+    scene=context.scene
+    netimp=scene.netimport
+    netimp.frameint=args.frameint
+    netimp.orderbool=args.order
+    netimp.framebool=args.frame_from_suffix
+    netimp.instancebool=args.instance
+    netimp.mergebool=args.merge_edges
+    netimp.sharedmatbool=args.shared
+    netimp.linkbool=args.link
+    netimp.missingmode=args.missing
+    netimp.lod=args.lod
+    netimp.lodsize=args.lod_size
+    netimp.loddistance=args.lod_distance
+    netimp.lodrender=args.lod_render
+    netimp.keymode=args.keymode
+    netimp.livepath=args.live_path
+    netimp.changedbool=args.changed
+    netimp.keytolerance=args.tolerance
+    netimp.workers=args.workers or 0
+    netimp.cachepath=args.cache
+    netimp.cachesize=args.cache_size
+    netimp.streambool=args.stream
+    netimp.chunkrows=args.chunk_rows
+    netimp.largebool=args.large
+    netimp.loglevel=args.log
+    netimp.profilepath=args.profile
+    log.setLevel(args.log)
+    steps=folder_timesteps(args.folder,args.order,args.frame_from_suffix,args.frameint)
+    if not steps:
+        log.error("no networks found in "+args.folder)
+        sys.exit(1)
+    if args.keymode=="LIVE" and args.shards>1:
+        log.error("live sidecars can not be split into shards")
+        sys.exit(1)
+    if args.merge and (args.instance or args.merge_edges):
+        log.error("merged edges and instanced nodes can not be merged across shards")
+        sys.exit(1)
+    if args.shards>1 and args.shard is None:
+        failed=run_shards(argv,args)
+        if failed:
+            log.error(str(failed)+" shards failed")
+            sys.exit(1)
+        if args.merge:
+            paths=[shard_path(args.out,k) for k in range(args.shards)]
+            paths=[p for p in paths if os.path.exists(p)]
+            bpy.ops.wm.open_mainfile(filepath=os.path.abspath(paths[0]))
+            try:
+                merge_shards(bpy.context,[os.path.abspath(p) for p in paths[1:]])
+            except NetImportError as err:
+                log.error(str(err))
+                sys.exit(1)
+            bpy.context.scene.frame_start=steps[0][0]
+            bpy.context.scene.frame_end=steps[-1][0]
+            bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(args.out))
+        return
+    out=args.out
+    frame_start,frame_end=steps[0][0],steps[-1][0]
+    if args.shard is not None:
+        steps,frame_start,frame_end=shard_steps(steps,args.shards,args.shard)
+        out=shard_path(args.out,args.shard)
+        if not steps:
+            log.info("shard "+str(args.shard)+" has no networks")
+            return
+    try:
+        import_timesteps(context,steps,large=args.large)
+    except NetImportError as err:
+        log.error(str(err))
+        sys.exit(1)
+    scene.frame_start=frame_start
+    scene.frame_end=frame_end
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(out))
+    log.info("saved "+out)
 
 # ------------------------------------------------------------------------
 #    Registration
@@ -796,6 +2926,12 @@ classes = (
     NetProps,
     NetImport,
     FolderImport,
+    LargeNetImport,
+    LargeFolderImport,
+    ModalImport,
+    PreviewNetwork,
+    PreviewClear,
+    PreviewImport,
     NetImportPanel
 )
 
@@ -805,13 +2941,29 @@ def register():
         register_class(cls)
 
     bpy.types.Scene.netimport = PointerProperty(type=NetProps)
+    bpy.app.handlers.render_pre.append(lod_render_pre)
+    bpy.app.handlers.render_post.append(lod_render_post)
+    bpy.app.handlers.render_cancel.append(lod_render_post)
+    bpy.app.handlers.frame_change_post.append(preview_frame_change)
+    bpy.app.handlers.frame_change_pre.append(live_frame_change)
 
 def unregister():
     from bpy.utils import unregister_class
+    clear_preview()
     for cls in reversed(classes):
         unregister_class(cls)
     del bpy.types.Scene.netimport
+    for handlers,handler in ((bpy.app.handlers.render_pre,lod_render_pre),
+                             (bpy.app.handlers.render_post,lod_render_post),
+                             (bpy.app.handlers.render_cancel,lod_render_post),
+                             (bpy.app.handlers.frame_change_post,preview_frame_change),
+                             (bpy.app.handlers.frame_change_pre,live_frame_change)):
+        if handler in handlers:
+            handlers.remove(handler)
 
 
 if __name__ == "__main__":
-    register()
\ No newline at end of file
+    register()
+    #blender -b -P import_network.py -- --folder ... --out ...
+    if "--" in sys.argv:
+        run_cli(sys.argv[sys.argv.index("--")+1:])
\ No newline at end of file